@@ -1,8 +1,10 @@
 import json
 import re
 import sys
+import time
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 from pathlib import Path
 
 import xbmc
@@ -280,6 +282,11 @@ def list_show_episodes(show_name):
 # Extensions Kodi can play (streaming / direct media)
 STREAM_EXTENSIONS = (".m3u8", ".mp4", ".mpd", ".ts")
 
+# Limits for following iframes from one episode page
+IFRAME_MAX_REQUESTS = 20
+IFRAME_TIME_BUDGET = 30
+IFRAME_WORKERS = 4
+
 
 def _is_playable_media_url(url):
     """Return True if URL looks like a direct playable stream (m3u8, mp4, mpd, ts)."""
@@ -427,18 +434,12 @@ def _get_all_iframe_urls(html, page_url):
     return urls
 
 
-def extract_stream_url_from_page(html, page_url=None, iframe_depth=3):
-    """
-    Extract a playable stream URL (m3u8, mp4, mpd, ts) from page HTML.
-    If the page only has an iframe, fetch the iframe(s) and extract from there.
-    Follows up to iframe_depth levels (default 3) and tries all iframes until one yields a stream.
-    """
-    # 1) First look for direct media URLs in this page
+def _extract_from_html(html):
+    """Steps 1 and 2 of extract_stream_url_from_page: direct media, then Dailymotion."""
     direct = _extract_media_urls(html)
     if direct:
         return direct
 
-    # 2) Look for Dailymotion video IDs in the page (URL, data-video, script, etc.)
     dm_ids = set()
     has_dm = "dailymotion" in html.lower()
     for m in re.finditer(
@@ -459,42 +460,95 @@ def extract_stream_url_from_page(html, page_url=None, iframe_depth=3):
         stream_url = _resolve_dailymotion_stream(dm_id)
         if stream_url and stream_url.startswith("http"):
             return stream_url
+    return None
 
-    # 3) Try every iframe on the page until one gives us a stream
-    if iframe_depth > 0:
-        iframe_urls = _get_all_iframe_urls(html, page_url)
-        for iframe_src in iframe_urls:
-            # Dailymotion embed: resolve via their metadata API instead of parsing HTML
-            dm_id = _dailymotion_video_id(iframe_src)
-            if dm_id:
-                log(f"Resolving Dailymotion video: {dm_id}")
-                stream_url = _resolve_dailymotion_stream(dm_id)
-                if stream_url and _is_playable_media_url(stream_url):
-                    return stream_url
-                # Metadata might return a redirect URL; try using it anyway
-                if stream_url and stream_url.startswith("http"):
-                    return stream_url
-                continue
-            # Other iframes: fetch and recurse
-            log(f"Following iframe ({iframe_depth} left): {iframe_src}")
+
+def _fetch_iframe(iframe_src, referer):
+    try:
+        req = urllib.request.Request(
+            iframe_src,
+            headers={
+                **BROWSER_HEADERS,
+                "Referer": referer or "",
+            },
+        )
+        with urllib.request.urlopen(req, timeout=15) as resp:
+            return resp.read().decode("utf-8", errors="ignore")
+    except Exception as exc:  # noqa: BLE001
+        log(f"Failed to fetch iframe {iframe_src}: {exc}")
+        return None
+
+
+def extract_stream_url_from_page(html, page_url=None, iframe_depth=3):
+    """
+    Extract a playable stream URL (m3u8, mp4, mpd, ts) from page HTML.
+    If the page only has an iframe, fetch the iframe(s) and extract from there.
+
+    Iframes are followed breadth-first, up to iframe_depth levels (default 3).
+    The iframes of a level are fetched in parallel, each URL at most once,
+    and the first one that yields a stream wins. The whole crawl is limited
+    to IFRAME_MAX_REQUESTS fetches and IFRAME_TIME_BUDGET seconds.
+    """
+    # 1) Direct media URLs, 2) Dailymotion video IDs in the page
+    result = _extract_from_html(html)
+    if result:
+        return result
+
+    # 3) Try the iframes, level by level, until one gives us a stream
+    visited = {page_url}
+    pages = [(page_url, html)]
+    requests_left = IFRAME_MAX_REQUESTS
+    deadline = time.monotonic() + IFRAME_TIME_BUDGET
+    executor = ThreadPoolExecutor(IFRAME_WORKERS)
+    futures = {}
+    try:
+        for level in range(iframe_depth):
+            to_fetch = []
+            for parent_url, parent_html in pages:
+                for iframe_src in _get_all_iframe_urls(parent_html, parent_url):
+                    if iframe_src in visited:
+                        continue
+                    visited.add(iframe_src)
+                    # Dailymotion embed: resolve via their metadata API instead of parsing HTML
+                    dm_id = _dailymotion_video_id(iframe_src)
+                    if dm_id:
+                        log(f"Resolving Dailymotion video: {dm_id}")
+                        stream_url = _resolve_dailymotion_stream(dm_id)
+                        if stream_url and _is_playable_media_url(stream_url):
+                            return stream_url
+                        # Metadata might return a redirect URL; try using it anyway
+                        if stream_url and stream_url.startswith("http"):
+                            return stream_url
+                        continue
+                    to_fetch.append((iframe_src, parent_url))
+
+            to_fetch = to_fetch[:requests_left]
+            requests_left -= len(to_fetch)
+            if not to_fetch:
+                break
+            log(f"Following {len(to_fetch)} iframe(s) ({iframe_depth - level} level(s) left)")
+            futures = {
+                executor.submit(_fetch_iframe, iframe_src, referer): i
+                for i, (iframe_src, referer) in enumerate(to_fetch)
+            }
+            fetched = {}
             try:
-                req = urllib.request.Request(
-                    iframe_src,
-                    headers={
-                        **BROWSER_HEADERS,
-                        "Referer": page_url or "",
-                    },
-                )
-                with urllib.request.urlopen(req, timeout=15) as resp:
-                    iframe_html = resp.read().decode("utf-8", errors="ignore")
-                result = extract_stream_url_from_page(
-                    iframe_html, page_url=iframe_src, iframe_depth=iframe_depth - 1
-                )
-                if result:
-                    return result
-            except Exception as exc:  # noqa: BLE001
-                log(f"Failed to fetch iframe {iframe_src}: {exc}")
-                continue
+                for future in as_completed(futures, timeout=max(deadline - time.monotonic(), 0)):
+                    iframe_html = future.result()
+                    if not iframe_html:
+                        continue
+                    result = _extract_from_html(iframe_html)
+                    if result:
+                        return result
+                    fetched[futures[future]] = iframe_html
+            except FuturesTimeoutError:
+                log("Iframe time budget used up")
+                break
+            pages = [(to_fetch[i][0], fetched[i]) for i in sorted(fetched)]
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
 
     return None
 
@@ -1,4 +1,6 @@
+import atexit
 import sqlite3
+import threading
 import time
 from typing import Optional
 import requests
@@ -9,23 +11,60 @@ import json
 
 
 class _DB:
+    # Seconds between sweeps of stale rows, and the minimum age a row must
+    # reach before a sweep removes it.
+    SWEEP_INTERVAL = 6 * 60 * 60
+    EXPIRY_GRACE = 7 * 24 * 60 * 60
+
     def __init__(self):
+        self.con = None
+        self.pending = {}
+        self.lock = threading.RLock()
         if not xbmcaddon.Addon().getSettingBool("use_cache"):
             return
         self.db = xbmcaddon.Addon().getAddonInfo("path") + "/cache.db"
         self.cache_timer =  float(xbmcaddon.Addon().getSetting("time_cache") or 0)
+
+    def connect(self) -> Optional[sqlite3.Connection]:
+        """Open the process-wide connection on first use."""
+        with self.lock:
+            if self.con is not None:
+                return self.con
+            try:
+                con = sqlite3.connect(self.db, check_same_thread=False)
+                con.execute("PRAGMA journal_mode = WAL")
+                con.execute("PRAGMA synchronous = NORMAL")
+                # url is the primary key, so lookups already go through its index
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS cache(url text PRIMARY KEY, response text, created int)"
+                )
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_meta(key text PRIMARY KEY, value int)"
+                )
+                con.commit()
+            except sqlite3.Error as e:
+                xbmc.log(f"Failed to open the sqlite cache: {e}", xbmc.LOGINFO)
+                return None
+            self.con = con
+            atexit.register(self.close)
+            self.sweep()
+            return con
+
+    def sweep(self) -> None:
+        """Drop rows nobody has refreshed in a long while, at most every SWEEP_INTERVAL."""
+        now = time.time()
         try:
-            self.con = sqlite3.connect(self.db)
-            self.cursor = self.con.cursor()
-            self.cursor.execute(
-            "CREATE TABLE IF NOT EXISTS cache(url text PRIMARY KEY, response text, created int)"
-        )
-            self.con.commit()
+            row = self.con.execute("SELECT value FROM cache_meta WHERE key = 'last_sweep'").fetchone()
+            if row and now - row[0] < self.SWEEP_INTERVAL:
+                return
+            cutoff = now - max(self.cache_timer * 60, self.EXPIRY_GRACE)
+            with self.con:
+                self.con.execute("DELETE FROM cache WHERE created < ?", (cutoff,))
+                self.con.execute(
+                    "INSERT OR REPLACE INTO cache_meta(key, value) VALUES('last_sweep', ?)", (int(now),)
+                )
         except sqlite3.Error as e:
-            xbmc.log(f"Failed to write data to the sqlite table: {e}", xbmc.LOGINFO)
-        finally:
-            if self.con:
-                self.close()
+            xbmc.log(f"Failed to sweep the sqlite cache: {e}", xbmc.LOGINFO)
 
     def set(self, url: str, response: str) -> None:
         if url.startswith("m3u"):
@@ -41,68 +80,71 @@ class _DB:
                 xbmc.log(f'Json Error: {e}', xbmc.LOGINFO)
                 if (c_created + self.cache_timer*60) > created:
                     created = c_created
-
-        try:
-            self.con = sqlite3.connect(self.db)
-            self.cursor = self.con.cursor()
-            self.cursor.execute(
-                """INSERT OR REPLACE INTO cache(url, response, created) VALUES(?, ?, ?);
-""",
-                (url, response, created),
-            )
-            self.con.commit()
-        except sqlite3.Error as e:
-            xbmc.log(f"Failed to write data to the sqlite table: {e}", xbmc.LOGINFO)
-        finally:
-            if self.con:
-                self.close()
+        # Written in one batch by flush() once the route is done
+        with self.lock:
+            self.pending[url] = (response, created)
 
     def get(self, url: str) -> Optional[str]:
         response = None
         if url.startswith("m3u"):
             url = url.split("|")[1]
-        try:
-            self.con = sqlite3.connect(self.db)
-            self.cursor = self.con.cursor()
-            self.cursor.execute(
-                """SELECT response, created FROM cache WHERE url = ?""", (url,)
-            )
-            response = self.cursor.fetchone()
-        except sqlite3.Error as e:
-            xbmc.log(f"Failed to read data from the sqlite table: {e}", xbmc.LOGINFO)
-        finally:
-            if self.con:
-                self.con.close()
+        with self.lock:
+            if url in self.pending:
+                return self.pending[url]
+            con = self.connect()
+            if con is None:
+                return None
+            try:
+                response = con.execute(
+                    """SELECT response, created FROM cache WHERE url = ?""", (url,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                xbmc.log(f"Failed to read data from the sqlite table: {e}", xbmc.LOGINFO)
         return response
 
+    def flush(self) -> None:
+        """Write all pending set() calls in a single transaction."""
+        with self.lock:
+            if not self.pending:
+                return
+            rows = [(url, response, created) for url, (response, created) in self.pending.items()]
+            self.pending.clear()
+            con = self.connect()
+            if con is None:
+                return
+            try:
+                with con:
+                    con.executemany(
+                        "INSERT OR REPLACE INTO cache(url, response, created) VALUES(?, ?, ?)", rows
+                    )
+            except sqlite3.Error as e:
+                xbmc.log(f"Failed to write data to the sqlite table: {e}", xbmc.LOGINFO)
+
     def close(self) -> None:
-        self.con.close()
-        
+        with self.lock:
+            if self.con is None:
+                return
+            self.flush()
+            self.con.close()
+            self.con = None
+
     def cache_reset(self, sender: str) :
         from xbmcgui import Dialog
         dialog = Dialog()
-        try:
-            self.con = sqlite3.connect(self.db)
-            self.cursor = self.con.cursor()
-            self.cursor.execute('DELETE FROM cache;',)
-            self.con.commit()
-        except sqlite3.Error as e:
-            xbmc.log(f"Failed to delete data from the sqlite table: {e}", xbmc.LOGINFO)
-            dialog.ok("Clear Cache", "There was a problem clearing cache.\nCheck the log for details.")
-            return
-        finally:
-            if self.con:
-                self.close()
-        try:
-            self.con = sqlite3.connect(self.db)
-            self.cursor = self.con.cursor()
-            self.cursor.execute('VACUUM;',)
-            self.con.commit()
-        except sqlite3.Error as e:
-            xbmc.log(f"Failed to vacuum data from the sqlite table: {e}", xbmc.LOGINFO)
-        finally:
-            if self.con:
-                self.close()  
+        with self.lock:
+            self.pending.clear()
+            con = self.connect()
+            try:
+                if con is None:
+                    raise sqlite3.Error("cache database unavailable")
+                with con:
+                    con.execute('DELETE FROM cache;',)
+                # Shrink the WAL file rather than rewriting the whole database
+                con.execute('PRAGMA wal_checkpoint(TRUNCATE);')
+            except sqlite3.Error as e:
+                xbmc.log(f"Failed to delete data from the sqlite table: {e}", xbmc.LOGINFO)
+                dialog.ok("Clear Cache", "There was a problem clearing cache.\nCheck the log for details.")
+                return
                       
         # dialog.ok(xbmcaddon.Addon().getAddonInfo("name"), f'{sender = }')                
         if sender == 'clear' :
@@ -55,11 +55,25 @@ class Plugin:
 
 
 plugin_cache = {}
+HOOKS = tuple(
+    name for name, value in vars(Plugin).items()
+    if callable(value) and not name.startswith("_")
+)
+manifest = None
 
 
-def get_plugins() -> List[Plugin]:
-    from . import plugins
+def get_manifest():
+    global manifest
+    if manifest is None:
+        from . import plugins
+        from .util.plugin_manifest import PluginManifest
+
+        manifest = PluginManifest(plugins.__name__, plugins.__path__[0], Plugin, loaded_plugins, HOOKS)
+    return manifest
+
 
+def loaded_plugins() -> List[Plugin]:
+    """Instances of the plugin classes imported so far."""
     klasses = Plugin.subclasses
     plugins = []
     for klass in klasses:
@@ -70,17 +84,51 @@ def get_plugins() -> List[Plugin]:
             plugins.append(plugin_cache[klass])
     return plugins
 
+
+def get_plugins() -> List[Plugin]:
+    get_manifest().load_all()
+    return loaded_plugins()
+
 def register_routes(plugin_route):
-    plugins = get_plugins()
+    # Only modules with a route that can match this invocation are imported
+    path = (getattr(plugin_route, "path", None) or "/").rstrip("/") or "/"
+    get_manifest().load_routes(path)
+    plugins = loaded_plugins()
     for plugin in plugins:
         if hasattr(plugin, "routes"): plugin.routes(plugin_route)
 
 
-def run_hook(*args: Tuple[str, ...], return_item_on_failure=False) -> Any:
-    plugins = get_plugins()
-    function_name = args[0]
-    other_args = args[1:]
-    plugins = sorted(plugins, key=lambda plugin: plugin.priority, reverse=True)
+hook_index = {}
+
+
+def get_hook_plugins(function_name: str) -> List[Plugin]:
+    """
+    Plugins implementing ``function_name``, highest priority first.
+
+    Only the modules providing the hook are imported, and plugins that
+    only inherit the no-op from Plugin are left out. The lists are built
+    once per hook and rebuilt only when new plugin classes have been
+    registered since. Equal priorities are ordered by module name so the
+    result does not depend on which modules happen to be loaded already.
+    """
+    get_manifest().load_hook(function_name)
+    plugins = loaded_plugins()
+    if hook_index.get("__count__") != len(plugins):
+        hook_index.clear()
+        hook_index["__count__"] = len(plugins)
+    if function_name not in hook_index:
+        base = getattr(Plugin, function_name, None)
+        implementing = [
+            plugin for plugin in plugins
+            if getattr(type(plugin), function_name, base) is not base
+        ]
+        hook_index[function_name] = sorted(
+            implementing, key=lambda plugin: (-plugin.priority, type(plugin).__module__)
+        )
+    return hook_index[function_name]
+
+
+def _dispatch(plugins: List[Plugin], function_name: str, other_args: Tuple, return_item_on_failure: bool) -> Any:
     for plugin in plugins:
         result = getattr(plugin, function_name)(*other_args)
         if result:
@@ -91,3 +139,21 @@ def run_hook(*args: Tuple[str, ...], return_item_on_failure=False) -> Any:
         else:
             return other_args
     return False
+
+
+def run_hook(*args: Tuple[str, ...], return_item_on_failure=False) -> Any:
+    function_name = args[0]
+    plugins = get_hook_plugins(function_name)
+    try:
+        return _dispatch(plugins, function_name, args[1:], return_item_on_failure)
+    finally:
+        # Rendering the list is the last step of a route: persist the
+        # cache writes batched up while building it.
+        if function_name == "display_list":
+            DI.db.flush()
+
+
+def run_hook_many(function_name: str, items: List[Any], return_item_on_failure=False) -> List[Any]:
+    """Same as ``[run_hook(function_name, item) for item in items]``, resolving the plugins once."""
+    plugins = get_hook_plugins(function_name)
+    return [_dispatch(plugins, function_name, (item,), return_item_on_failure) for item in items]
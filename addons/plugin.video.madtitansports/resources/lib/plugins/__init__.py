@@ -7,4 +7,3 @@ __all__ = [
     for filename in files
     if not filename.startswith("__") and filename.endswith(".py")
 ]
-from . import *
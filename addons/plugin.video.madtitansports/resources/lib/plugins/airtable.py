@@ -2,7 +2,7 @@ from ..plugin import Plugin
 from ..util.dialogs import link_dialog
 import xbmc, json, xbmcgui
 from resources.lib.external.airtable.airtable import Airtable
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 import xml.etree.ElementTree as ET
 
 CACHE_TIME = 0
@@ -97,6 +97,6 @@ class airtable(Plugin):
                 else:
                     run_hook("play_video", json.dumps({"link": link, "title": table_split[-1]}))
             else:
-                jen_list = [run_hook("process_item", item) for item in jen_list]
-                jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+                jen_list = run_hook_many("process_item", jen_list)
+                jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
                 run_hook("display_list", jen_list)
\ No newline at end of file
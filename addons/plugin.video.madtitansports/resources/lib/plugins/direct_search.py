@@ -16,7 +16,7 @@ from resources.lib.plugin import Plugin
 from datetime import datetime, timedelta
 import calendar, inputstreamhelper
 from jetextractors import extractor
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 import urllib.parse
 
 import operator, traceback
@@ -69,8 +69,8 @@ class DirectSearch(Plugin):
                 jen_list.append(jen_data)
             
             jen_list = sorted(jen_list, key=lambda x: x["time"])
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
 
         @plugin.route(f"/{self.name}/search_dialog/<path:query>")
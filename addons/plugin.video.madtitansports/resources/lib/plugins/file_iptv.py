@@ -14,6 +14,10 @@ from xbmcvfs import translatePath
 
 from ..plugin import Plugin
 from ..util.dialogs import link_dialog
+from ..util.server_validation import validate_servers
+from ..util.iptv_db import (
+    connect_db, connect_ingest_db, init_search_index, search_channel_rows, sync_server_channels,
+)
 from resources.lib.plugin import run_hook
 
 # Addon paths
@@ -52,6 +56,10 @@ DEFAULT_CONFIG = {
     "min_connections": 2,
     # Max number of servers to validate per update run
     "max_servers_per_update": 50,
+    # How many servers to validate in parallel during an update run
+    "validation_workers": 8,
+    # Max parallel validations against the same panel host
+    "validation_per_host": 2,
     # Whether to test stream URLs during validation
     "stream_check_enabled": True,
     # How many candidate channels to test per server when stream_check_enabled is True
@@ -129,7 +137,7 @@ def should_auto_update_now() -> bool:
     return (now - last_ts) >= interval
 
 def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
+    with connect_db(DB_PATH) as conn:
         conn.execute("""
             CREATE TABLE IF NOT EXISTS servers (
                 address TEXT,
@@ -171,6 +179,7 @@ def init_db():
         except Exception:
             pass
         conn.commit()
+        init_search_index(conn)
 
 
 def load_recent_searches(max_items: int = 20):
@@ -366,11 +375,10 @@ def update_m3u_playlists():
                     channels.append((name, url))
                     current_name = None
 
-            with sqlite3.connect(DB_PATH) as conn:
-                cur = conn.cursor()
+            with connect_ingest_db(DB_PATH) as conn:
                 # Represent each playlist as a synthetic server keyed by the
                 # playlist URL/path and M3U_USERNAME.
-                cur.execute(
+                conn.execute(
                     """
                     INSERT OR REPLACE INTO servers
                     (address, username, password, last_checked, is_valid, max_connections)
@@ -378,30 +386,17 @@ def update_m3u_playlists():
                     """,
                     (src, M3U_USERNAME, "", now),
                 )
-
-                # Clear any existing channels for this playlist
-                cur.execute(
-                    """
-                    DELETE FROM channels
-                    WHERE address = ? AND username = ? AND password = ?
-                    """,
+                rows = {
+                    f"m3u_{idx}": (name, clean_string(name), url)
+                    for idx, (name, url) in enumerate(channels)
+                }
+                sync_server_channels(
+                    conn,
                     (src, M3U_USERNAME, ""),
+                    rows,
+                    columns=("name", "search", "stream_url"),
                 )
 
-                for idx, (name, url) in enumerate(channels):
-                    search = clean_string(name)
-                    stream_id = f"m3u_{idx}"
-                    cur.execute(
-                        """
-                        INSERT OR REPLACE INTO channels
-                        (address, username, password, stream_id, name, search, stream_url)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (src, M3U_USERNAME, "", stream_id, name, search, url),
-                    )
-
-                conn.commit()
-
             xbmc.log(
                 f"[file_iptv] Indexed {len(channels)} channels from M3U source: {src}",
                 xbmc.LOGINFO,
@@ -543,39 +538,38 @@ def validate_server(server):
 
 def store_server_channels(server, panel_data, max_conn):
     address, username, password = server
+    exclude_groups = [g.lower() for g in config.get("exclude_groups", [])]
+    exclude_names = [n.lower() for n in config.get("exclude_names", [])]
+    channels = {}
+    for channel in panel_data.get("available_channels", {}).values():
+        name = (channel.get("name") or "").strip()
+        if not name:
+            continue
+
+        # Skip if name matches any excluded name pattern
+        name_l = name.lower()
+        if any(ex in name_l for ex in exclude_names):
+            continue
+
+        category = (channel.get("category_name") or "").strip().lower()
+        if any(ex in category for ex in exclude_groups):
+            continue
+
+        channels[str(channel["stream_id"])] = (name, clean_string(name))
+
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        # Server row and channel diff go in as one transaction
+        with connect_ingest_db(DB_PATH) as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO servers (address, username, password, last_checked, is_valid, max_connections)
                 VALUES (?, ?, ?, ?, 1, ?)
             """, (address, username, password, int(time.time()), int(max_conn)))
+            added, changed, removed = sync_server_channels(conn, server, channels)
 
-            exclude_groups = [g.lower() for g in config.get("exclude_groups", [])]
-            exclude_names = [n.lower() for n in config.get("exclude_names", [])]
-            for channel in panel_data.get("available_channels", {}).values():
-                name = (channel.get("name") or "").strip()
-                if not name:
-                    continue
-
-                # Skip if name matches any excluded name pattern
-                name_l = name.lower()
-                if any(ex in name_l for ex in exclude_names):
-                    continue
-
-                category = (channel.get("category_name") or "").strip().lower()
-                if any(ex in category for ex in exclude_groups):
-                    continue
-
-                search = clean_string(name)
-                conn.execute("""
-                    INSERT OR REPLACE INTO channels
-                    (address, username, password, stream_id, name, search)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (address, username, password, channel["stream_id"], name, search))
-
-            conn.commit()
-
-        xbmc.log(f"[file_iptv] Stored channels for: {address}", xbmc.LOGINFO)
+        xbmc.log(
+            f"[file_iptv] Stored channels for: {address} (+{added} ~{changed} -{removed})",
+            xbmc.LOGINFO,
+        )
         return True
     except Exception as e:
         xbmc.log(f"[file_iptv] Failed to store {address}: {e}", xbmc.LOGERROR)
@@ -586,68 +580,32 @@ def search_channels(term, limit=20, per_address=5, country_filter=None):
     # Log the raw and cleaned search terms for debugging (optional)
     if config.get("debug_logging", False):
         xbmc.log(f"[file_iptv] search term='{term}' cleaned='{cleaned}'", xbmc.LOGINFO)
-    like_pattern = f"%{cleaned}%"
-
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT c.address, c.username, c.password, c.stream_id, c.name, c.search, c.stream_url, s.max_connections
-            FROM channels c
-            JOIN servers s ON c.address = s.address
-                          AND c.username = s.username
-                          AND c.password = s.password
-            WHERE s.is_valid = 1
-              AND COALESCE(s.search_enabled, 1) = 1
-              AND c.search LIKE ?
-            ORDER BY LENGTH(c.search) - LENGTH(?)
-        """, (like_pattern, cleaned))
-        rows = cur.fetchall()
-    if config.get("debug_logging", False):
-        xbmc.log(f"[file_iptv] total DB matches before filter: {len(rows)}", xbmc.LOGINFO)
-
-    # Optional country filter based on original channel name
-    if country_filter:
-        cf = country_filter.strip().lower()
-        if cf:
-            rows = [
-                r for r in rows
-                if cf in (r["name"] or "").lower()
-            ]
-            if config.get("debug_logging", False):
-                xbmc.log(
-                    f"[file_iptv] matches after country filter '{cf}': {len(rows)}",
-                    xbmc.LOGINFO,
-                )
 
     # Term-specific exclusion rules: for some very broad base queries like
     # "ESPN" we want to hide certain variants (e.g. PLUS, NCAAB, vs) unless
     # the user explicitly includes those words in the query. This avoids
     # clutter when searching for the main channel while still allowing
     # targeted searches like "ESPN PLUS" or "ESPN NCAAB" to work.
+    # This depends on the query, so it cannot be applied at index time: the
+    # variants must stay in channels_fts for "ESPN PLUS" to find them. The
+    # NOT LIKE checks only run on the rows the FTS match already narrowed.
     raw_term = (term or "").strip().lower()
-    if raw_term == "espn":
-        special_words = ["plus", "vs", "ncaab","play"]
-        # Only filter these variants when the user did *not* ask for them
-        if not any(w in raw_term for w in special_words):
-            before_len = len(rows)
-            rows = [
-                r for r in rows
-                if not any(w in (r["name"] or "").lower() for w in special_words)
-            ]
-            if config.get("debug_logging", False):
-                xbmc.log(
-                    f"[file_iptv] ESPN base search: filtered {before_len - len(rows)} variants with special words",
-                    xbmc.LOGINFO,
-                )
+    exclude_words = ["plus", "vs", "ncaab", "play"] if raw_term == "espn" else []
 
-    is_digit = cleaned[-1].isdigit() if cleaned else False
-    filtered = [
-        r for r in rows
-        if is_digit or not re.match(re.escape(cleaned) + r"\d", r["search"], re.IGNORECASE)
-    ]
+    # Substring match, country filter, ESPN variants and the digit rule
+    # ("espn" should not list "espn2") are all resolved by the FTS query.
+    with connect_db(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        filtered = search_channel_rows(
+            conn,
+            cleaned,
+            "c.address, c.username, c.password, c.stream_id, c.name, c.search, c.stream_url, s.max_connections",
+            conditions=[("COALESCE(s.search_enabled, 1) = 1", ())],
+            country_filter=country_filter,
+            exclude_name_words=exclude_words,
+        )
     if config.get("debug_logging", False):
-        xbmc.log(f"[file_iptv] matches after digit-filter: {len(filtered)}", xbmc.LOGINFO)
+        xbmc.log(f"[file_iptv] matches: {len(filtered)} (country='{country_filter or ''}')", xbmc.LOGINFO)
 
     results = []
     counts = {}
@@ -892,7 +850,7 @@ class FileIPTV(Plugin):
             if ":::" in query:
                 country_filter, term = query.split(":::", 1)
 
-            with sqlite3.connect(DB_PATH) as conn:
+            with connect_db(DB_PATH) as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT COUNT(*) FROM servers WHERE is_valid = 1")
                 server_count = cur.fetchone()[0]
@@ -973,7 +931,7 @@ class FileIPTV(Plugin):
             if ":::" in query:
                 country_filter, term = query.split(":::", 1)
 
-            with sqlite3.connect(DB_PATH) as conn:
+            with connect_db(DB_PATH) as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT COUNT(*) FROM servers WHERE is_valid = 1")
                 server_count = cur.fetchone()[0]
@@ -1029,7 +987,7 @@ class FileIPTV(Plugin):
 
         @plugin.route(f"/{self.name}/manage_servers")
         def manage_servers():
-            with sqlite3.connect(DB_PATH) as conn:
+            with connect_db(DB_PATH) as conn:
                 conn.row_factory = sqlite3.Row
                 cur = conn.cursor()
                 cur.execute("""
@@ -1131,7 +1089,7 @@ class FileIPTV(Plugin):
                     # Definitively invalid: mark as invalid and clear channels
                     elif result is False:
                         try:
-                            with sqlite3.connect(DB_PATH) as conn:
+                            with connect_db(DB_PATH) as conn:
                                 cur = conn.cursor()
                                 cur.execute(
                                     """
@@ -1177,7 +1135,7 @@ class FileIPTV(Plugin):
                         continue
 
                     try:
-                        with sqlite3.connect(DB_PATH) as conn:
+                        with connect_db(DB_PATH) as conn:
                             cur = conn.cursor()
                             cur.execute("""
                                 DELETE FROM channels
@@ -1202,7 +1160,7 @@ class FileIPTV(Plugin):
                 # Toggle whether this server participates in search
                 if action == 3:
                     try:
-                        with sqlite3.connect(DB_PATH) as conn:
+                        with connect_db(DB_PATH) as conn:
                             cur = conn.cursor()
                             cur.execute(
                                 """
@@ -1243,6 +1201,7 @@ class FileIPTV(Plugin):
                 recheck_hours = config.get("recheck_hours", 12)
                 min_conn_required = config.get("min_connections", 3)
                 max_servers = config.get("max_servers_per_update", 10)
+                validation_workers = config.get("validation_workers", 8)
                 stream_check_enabled = bool(config.get("stream_check_enabled", True))
                 stream_candidates = config.get("stream_check_candidates", 5)
                 proxy_mode = config.get("proxy_mode", "auto")
@@ -1271,6 +1230,7 @@ class FileIPTV(Plugin):
                     f"Server re-check interval: [B][COLORyellow]{recheck_hours}[/COLOR][/B] hours",
                     f"Minimum connections per server: [B][COLORlime]{min_conn_required}[/COLOR][/B]",
                     f"Servers to validate per update: [B][COLORyellow]{max_servers}[/COLOR][/B]",
+                    f"Parallel server validations: [B][COLORyellow]{validation_workers}[/COLOR][/B]",
                     f"Stream check: [B]{'[COLORgreen]Enabled[/COLOR]' if stream_check_enabled else '[COLORred]Disabled[/COLOR]'}[/B]",
                     f"Stream check candidates: [B][COLORyellow]{stream_candidates}[/COLOR][/B] channels/server",
                     f"Preferred test channel names: [COLORaqua]{keywords_str}[/COLOR]",
@@ -1382,13 +1342,24 @@ class FileIPTV(Plugin):
                         config["max_servers_per_update"] = int(val)
                         save_config()
 
-                # Toggle stream check on/off
+                # Number of servers validated in parallel
                 elif idx == 7:
+                    val = dlg.input(
+                        "Parallel server validations",
+                        defaultt=str(validation_workers),
+                        type=xbmcgui.INPUT_NUMERIC,
+                    )
+                    if val and val.isdigit() and int(val) > 0:
+                        config["validation_workers"] = int(val)
+                        save_config()
+
+                # Toggle stream check on/off
+                elif idx == 8:
                     config["stream_check_enabled"] = not stream_check_enabled
                     save_config()
 
                 # Number of candidate channels to test per server
-                elif idx == 8:
+                elif idx == 9:
                     val = dlg.input(
                         "Stream check candidates per server",
                         defaultt=str(stream_candidates),
@@ -1399,7 +1370,7 @@ class FileIPTV(Plugin):
                         save_config()
 
                 # Preferred test channel keywords
-                elif idx == 9:
+                elif idx == 10:
                     val = dlg.input(
                         "Preferred test channel names (comma-separated)",
                         defaultt=keywords_str,
@@ -1412,7 +1383,7 @@ class FileIPTV(Plugin):
                             save_config()
 
                 # Proxy mode: auto, jetproxy, or direct
-                elif idx == 10:
+                elif idx == 11:
                     options = [
                         "auto (jetproxy for servers, direct for unknown)",
                         "force jetproxy",
@@ -1429,12 +1400,12 @@ class FileIPTV(Plugin):
                         save_config()
 
                 # Toggle background auto-update
-                elif idx == 11:
+                elif idx == 12:
                     config["auto_update_enabled"] = not auto_update_enabled
                     save_config()
 
                 # Manage generic M3U sources list
-                elif idx == 12:
+                elif idx == 13:
                     sources = load_m3u_sources()
                     while True:
                         labels = list(sources) + ["[Add new]", "[Back]"]
@@ -1463,24 +1434,24 @@ class FileIPTV(Plugin):
                                 save_config()
 
                 # Toggle debug logging
-                elif idx == 13:
+                elif idx == 14:
                     config["debug_logging"] = not debug_logging
                     save_config()
 
                 # Update servers now (same as /file_iptv/update)
-                elif idx == 14:
+                elif idx == 15:
                     update()
 
                 # Manage servers list (same as /file_iptv/manage_servers)
-                elif idx == 15:
+                elif idx == 16:
                     manage_servers()
 
                 # Reset the IPTV database file (same as /file_iptv/reset)
-                elif idx == 16:
+                elif idx == 17:
                     reset()
 
                 # View recent searches (read-only list)
-                elif idx == 17:
+                elif idx == 18:
                     history = load_recent_searches()
                     if not history:
                         dlg.ok("Recent IPTV", "No recent searches yet.")
@@ -1496,7 +1467,7 @@ class FileIPTV(Plugin):
                         link_dialog(labels, return_idx=False, hide_links=False)
 
                 # Clear recent search history
-                elif idx == 18:
+                elif idx == 19:
                     if dlg.yesno("Recent IPTV", "Clear recent search history?"):
                         try:
                             if os.path.exists(RECENT_PATH):
@@ -1537,7 +1508,7 @@ class FileIPTV(Plugin):
         if dialog:
             dialog.update(30, "Validating servers...")
 
-        with sqlite3.connect(DB_PATH) as conn:
+        with connect_db(DB_PATH) as conn:
             cur = conn.cursor()
             cur.execute("SELECT address, username, password FROM servers")
             existing = set(cur.fetchall())
@@ -1549,7 +1520,7 @@ class FileIPTV(Plugin):
                     """, server)
             conn.commit()
 
-        with sqlite3.connect(DB_PATH) as conn:
+        with connect_db(DB_PATH) as conn:
             cur = conn.cursor()
             recheck_hours = int(config.get("recheck_hours", 12))
             if recheck_hours == 0:
@@ -1589,24 +1560,17 @@ class FileIPTV(Plugin):
         if dialog:
             dialog.update(50, f"Validating {total_to_validate} servers...")
 
-        validated = 0
-        invalidated = 0
-        for i, server in enumerate(to_validate):
-            if dialog and dialog.iscanceled():
-                break
-
-            if dialog:
-                dialog.update(50 + int(40 * i / len(to_validate)),
-                              f"Validating server {i + 1}/{len(to_validate)}...")
+        stats = {"validated": 0, "invalidated": 0}
 
-            result = validate_server(server)
+        def commit(server, result):
+            # Runs on the single writer thread of validate_servers()
             if isinstance(result, tuple):
                 panel_data, max_conn = result
                 store_server_channels(server, panel_data, max_conn)
-                validated += 1
+                stats["validated"] += 1
             elif result is False:
                 # Definitively invalid (bad status, no channels, etc.)
-                with sqlite3.connect(DB_PATH) as conn:
+                with connect_db(DB_PATH) as conn:
                     cur = conn.cursor()
                     cur.execute("""
                         UPDATE servers
@@ -1618,16 +1582,31 @@ class FileIPTV(Plugin):
                         WHERE address = ? AND username = ? AND password = ?
                     """, server)
                     conn.commit()
-                invalidated += 1
+                stats["invalidated"] += 1
                 xbmc.log(f"[file_iptv] Marked invalid and removed channels: {server[0]}", xbmc.LOGINFO)
             else:
-                
                 xbmc.log(
                     f"[file_iptv] Skipping server due to transient validation error: {server[0]}",
                     xbmc.LOGINFO,
                 )
 
-        
+        def progress(done, total):
+            if dialog:
+                dialog.update(50 + int(40 * done / total),
+                              f"Validated {done}/{total} servers...")
+
+        validate_servers(
+            to_validate,
+            validate_server,
+            commit,
+            workers=int(config.get("validation_workers", 8) or 1),
+            per_host=int(config.get("validation_per_host", 2) or 1),
+            progress=progress,
+            is_canceled=dialog.iscanceled if dialog else None,
+        )
+        validated = stats["validated"]
+        invalidated = stats["invalidated"]
+
         try:
             update_m3u_playlists()
         except Exception as e:
@@ -1,4 +1,4 @@
-from resources.lib.plugin import Plugin, run_hook
+from resources.lib.plugin import Plugin, run_hook, run_hook_many
 import xbmcgui
 from bs4 import BeautifulSoup
 import urllib
@@ -161,8 +161,8 @@ class Fmstream(Plugin):
                 xbmcgui.Dialog().ok("No Results", "No stations found for this query. Try a different term (e.g., 'bbc' or 'pop').")
                 return
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
 
         @plugin.route(f"/{self.name}/play/<path:encoded_url>")
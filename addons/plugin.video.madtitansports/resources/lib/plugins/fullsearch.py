@@ -16,13 +16,14 @@ from resources.lib.plugin import Plugin
 from datetime import datetime, timedelta
 import calendar, inputstreamhelper
 from jetextractors import extractors, extractor
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 import urllib.parse
 
 import operator, traceback
 
 CACHE_TIME = 0  # change to wanted cache time in seconds
 SEARCH_INCLUDE = ["Full Match TV"]
+SEARCH_DEADLINE = 20  # seconds before the slowest extractors are left behind
 
 addon_fanart = xbmcaddon.Addon().getAddonInfo('fanart')
 addon_icon = xbmcaddon.Addon().getAddonInfo('icon')
@@ -53,7 +54,7 @@ class FullSearch(Plugin):
             if query == "*":
                 query = xbmcgui.Dialog().input("Search game")
                 if query == "": return
-            games = extractor.search_extractors(query, include=SEARCH_INCLUDE)
+            games = search_games(query)
             empty_date = datetime(year=2030, month=12, day=31)
             jen_list = []
             for game in games:
@@ -69,12 +70,40 @@ class FullSearch(Plugin):
                 jen_list.append(jen_data)
             
             jen_list = sorted(jen_list, key=lambda x: x["time"])
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
 
 
 
+def search_games(query):
+    """
+    Collect search results as extractors finish, stopping at SEARCH_DEADLINE
+    or when the user cancels, so the list shows whatever has been found.
+    """
+    games = []
+    dialog = xbmcgui.DialogProgress()
+    dialog.create("Search", f"Searching for {query}...")
+
+    def update(progress):
+        done = progress.total - len(progress.extractors)
+        dialog.update(
+            int(done * 100 / max(progress.total, 1)),
+            f"{progress.links} found so far\nWaiting on: {', '.join(progress.extractors)}"
+        )
+
+    results = extractor.iter_search_extractors(
+        query, include=SEARCH_INCLUDE, progress=update, deadline=SEARCH_DEADLINE, cancelled=dialog.iscanceled
+    )
+    try:
+        for name, items in results:
+            games.extend(items)
+    finally:
+        results.close()
+        dialog.close()
+    return games
+
+
 def format_time(date):
     return utc_to_local(date).strftime("%m/%d %I:%M %p") if date != None else ""
 
@@ -3,7 +3,7 @@ from hashlib import md5
 from base64 import b64decode, b64encode
 import xbmc, xbmcaddon, xbmcgui, xbmcplugin
 from xbmcvfs import translatePath
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 from collections import OrderedDict
 from ..plugin import Plugin
 from itertools import chain
@@ -72,7 +72,7 @@ class LNTV(Plugin):
                 "type": "dir",
             } for category in self.json_config["live_categories"]]
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
             run_hook("display_list", jen_list)
         
         @plugin.route("/lntv/category/<category>")
@@ -88,8 +88,8 @@ class LNTV(Plugin):
                 "type": "item"
             } for channel in channels]
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list)
             run_hook("display_list", jen_list)
 
 
@@ -1,12 +1,13 @@
 import os
-import re
 import requests
 import xbmc
 import xbmcaddon
 from ..plugin import Plugin
+from ..util.m3u_index import M3UIndex, parse_m3u
 
 addon_icon = xbmcaddon.Addon().getAddonInfo('icon')
 PATH = xbmcaddon.Addon().getAddonInfo("path")
+index = M3UIndex()
 
 class m3u(Plugin):
     name = "m3u"
@@ -20,6 +21,7 @@ class m3u(Plugin):
         self.session.headers.update(self.headers)
     
     def get_list(self, url: str):
+        category_url = url.startswith('m3ucat|')
         if url.startswith('m3u'):
             url = url.split('|')[1]
             if url.startswith("file://"):
@@ -27,9 +29,20 @@ class m3u(Plugin):
                 with open(os.path.join(PATH, "xml", url), 'r', encoding='utf-8', errors='ignore') as f:
                     return f.read()
         try:
-            resp = self.session.get(url)
+            # Opening a category only needs the index built when the
+            # playlist was listed, unless the playlist changed since.
+            headers = index.conditional_headers(url) if category_url else {}
+            resp = self.session.get(url, headers=headers)
+            if resp.status_code == 304:
+                text = index.rebuild(url)
+                if text is not None:
+                    return text
+                resp = self.session.get(url)
             resp.raise_for_status()  # Raise on HTTP errors (e.g., 404)
-            return resp.content.decode('utf-8', errors='replace')  # 'replace' for bad chars
+            text = resp.content.decode('utf-8', errors='replace')  # 'replace' for bad chars
+            if '#EXTINF' in text:
+                index.update(url, text, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+            return text
         except Exception as e:
             xbmc.log(f"M3U fetch error for {url}: {str(e)}", level=xbmc.LOGERROR)
             return ""  # Empty string fallback
@@ -40,22 +53,23 @@ class m3u(Plugin):
         
         if url.endswith('.m3u') or '#EXTINF' in response:
             if url.startswith('m3ucat|'):
-                cat = url.split('|')[2]
-                return self.get_catlist(response, cat)
+                playlist, cat = url.split('|')[1:3]
+                if not index.sync(playlist, response):
+                    return self.catlist_items(self.EpgRegex(response), cat)
+                return self.get_catlist(playlist, cat)
             
-            # NEW: Detect if it's a "simple video playlist" (no IPTV metadata)
-            # Check for tvg-* attributes or group-title in the entire response
-            import re  # Ensure re is available (already imported at top)
-            has_tvg = bool(re.search(r'tvg-(id|name|country|language|logo)=', response, re.IGNORECASE))
-            has_group = bool(re.search(r'group-title=', response, re.IGNORECASE))
+            if not index.sync(url, response):
+                return self.categories_menu(url, self.EpgRegex(response))
+            meta = index.playlist(url)
             
-            if not (has_tvg or has_group):
+            # NEW: Detect if it's a "simple video playlist" (no IPTV metadata)
+            # i.e. no tvg-* attributes or group-title on any entry
+            if not meta["has_meta"]:
                 # It's a simple playlist (like your chunks)—treat as SINGLE playable item
                 # Title: Use filename or fallback to first EXTINF title
-                title_match = re.search(r'#EXTINF:.*?,(.*?)(?=\n)', response, re.MULTILINE)
-                title = title_match.group(1).strip() if title_match else (os.path.basename(url) or 'Video Playlist')
+                title = meta["first_title"] or os.path.basename(url) or 'Video Playlist'
                 # If it's chunks, make title generic
-                if 'chunk' in title.lower() or '.ts' in response:
+                if 'chunk' in title.lower() or meta["has_ts"]:
                     title = 'Live Recording Stream'  # Customize as needed
                 
                 return [
@@ -68,13 +82,18 @@ class m3u(Plugin):
                 ]
             
             # ELSE: Standard IPTV parsing (categories/channels)
-            return self.categories_menu(url, response)
+            return self.categories_menu(url)
         
         return []  # Fallback
     
-    def categories_menu(self, url, response):
+    def categories_menu(self, url, m3udata=None):
+        if m3udata is None:
+            cats = index.categories(url)
+        else:
+            # Used only when the index cannot be written
+            cats = sorted(set(v['group_title'] for v in m3udata))
         item_list = []
-        for cat in self.get_categories(response):
+        for cat in cats:
             item_list.append(
                 {
                 'type': 'dir',
@@ -84,47 +103,14 @@ class m3u(Plugin):
                 }
             )
         return item_list
-    
-    def get_categories(self, response):
-        cats = []
-        cat = ''
-        country = ''
-        for v in re.compile(r'#EXTINF:(.+?),').findall(response):
-            if 'tvg-country' in v:
-                country = self.re_me(v, 'tvg-country=[\'"](.*?)[\'"]').strip()
-            if 'group-title' in v:
-                cat = self.re_me(v, 'group-title=[\'"](.*?)[\'"]').strip()
-            if cat == '':
-                if country != '':
-                    cat = country
-                else:
-                    cat = 'Uncategorized'
-            if not cat in cats:
-                cats.append(cat)
-        return sorted(cats)
 
     def EpgRegex(self, response):
         m3udata = []
-        match = re.compile(r'#EXTINF:(.+?),(.*?)[\n\r]+([^\n]+)').findall(response)
-        for other,channel_name,stream_url in match:
-            tvg_id='';tvg_name='';tvg_country='';tvg_language='';tvg_logo='';group_title=''
-            if 'tvg-id' in other:
-                tvg_id = self.re_me(other, 'tvg-id=[\'"](.*?)[\'"]').strip()
-            if 'tvg-name' in other:
-                tvg_name = self.re_me(other, 'tvg-name=[\'"](.*?)[\'"]').strip()
-            if 'tvg-country' in other:
-                tvg_country = self.re_me(other, 'tvg-country=[\'"](.*?)[\'"]').strip()
-            if 'tvg-language' in other:
-                tvg_language = self.re_me(other, 'tvg-language=[\'"](.*?)[\'"]').strip()
-            if 'tvg-logo' in other:
-                tvg_logo = self.re_me(other, 'tvg-logo=[\'"](.*?)[\'"]').strip()
-            if 'group-title' in other:
-                group_title = self.re_me(other, 'group-title=[\'"](.*?)[\'"]').strip()
-            if group_title == '':
-                if tvg_country != '':
-                    group_title = tvg_country
-                else:
-                    group_title = 'Uncategorized'
+        for attrs, channel_name, stream_url in parse_m3u(response):
+            get = attrs.get
+            tvg_id = get('tvg-id', '').strip()
+            tvg_name = get('tvg-name', '').strip()
+            tvg_country = get('tvg-country', '').strip()
             if tvg_name == '' and channel_name != '':
                 tvg_name = channel_name
             if channel_name =='' and tvg_name !='':
@@ -138,34 +124,36 @@ class m3u(Plugin):
                 "tvg_id": tvg_id,
                 "tvg_name": tvg_name,
                 "tvg_country": tvg_country,
-                "tvg_language": tvg_language,
-                "tvg_logo": tvg_logo,
-                "group_title": group_title,
+                "tvg_language": get('tvg-language', '').strip(),
+                "tvg_logo": get('tvg-logo', '').strip(),
+                "group_title": get('group-title', '').strip() or tvg_country or 'Uncategorized',
                 "channel_name": channel_name,
-                "stream_url": stream_url.strip()
+                "stream_url": stream_url
                 }
             )
         return m3udata
         
-    def get_catlist(self, response, category):
+    def get_catlist(self, url, category):
         item_list = []
-        for v in self.EpgRegex(response):
-            if v.get('group_title') == category:
-                title = v.get('tvg_name', 'Unknown Channel')
-                link = v.get('stream_url', '')
-                thumbnail = v.get('tvg_logo', addon_icon)
-                item_list.append(
-                    {
-                     'type': 'item',
-                     'title': title,
-                     'link': link,
-                     'thumbnail': thumbnail
-                    }
-                )
+        for title, link, thumbnail in index.entries(url, category):
+            item_list.append(
+                {
+                 'type': 'item',
+                 'title': title or 'Unknown Channel',
+                 'link': link,
+                 'thumbnail': thumbnail or addon_icon
+                }
+            )
         return item_list
-    
-    def re_me(self,data, re_patten):
-        m = re.search(re_patten, data)
-        if m is not None:
-            return m.group(1)
-        return ''
\ No newline at end of file
+
+    def catlist_items(self, m3udata, category):
+        # Used only when the index cannot be written
+        return [
+            {
+             'type': 'item',
+             'title': v['tvg_name'] or 'Unknown Channel',
+             'link': v['stream_url'],
+             'thumbnail': v['tvg_logo'] or addon_icon
+            }
+            for v in m3udata if v['group_title'] == category
+        ]
@@ -1,5 +1,5 @@
 from resources.lib.plugin import Plugin
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 import requests, xbmcgui, xbmcaddon, os, math, xbmc, json
 from xbmcvfs import translatePath
 from bs4 import BeautifulSoup
@@ -165,8 +165,8 @@ class mac(Plugin):
                     },
                     "type": "dir"
                 })
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
         
         @plugin.route(f"/{self.name}/genre/<path:url>")
@@ -218,8 +218,8 @@ class mac(Plugin):
                     },
                     "type": "dir"
                 })
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
 
         @plugin.route(f"/{self.name}/play/<path:url>")
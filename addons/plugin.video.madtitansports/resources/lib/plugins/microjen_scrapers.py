@@ -8,7 +8,7 @@
 #########################################
 
 from ..plugin import Plugin
-import json, re, xbmc
+import json, re, time, xbmc
 import xbmcaddon
 try:
     from resources.lib.util.common import *
@@ -21,6 +21,19 @@ scrapers_addon = xbmcaddon.Addon('script.module.microjenscrapers')
 scrapers_setting_bool = scrapers_addon.getSettingBool
 
 TIMEOUT = 10
+SCRAPE_WORKERS = 8
+# Stop scraping once this many links of an enabled quality are found
+ENOUGH_LINKS = 25
+QUALITY_SETTINGS = (
+    ("quality.4k", ".4K"),
+    ("quality.1080p", "1080p"),
+    ("quality.720p", "720p"),
+    ("quality.sd", "sd"),
+    ("quality.cam", "cam"),
+)
+
+_host_domains = None
+_disabled_qualities = None
 
 class MicroJenScrapers(Plugin):
     name = "microjenscrapers"
@@ -62,159 +75,48 @@ class MicroJenScrapers(Plugin):
         if link and link.startswith("search"):
             import microjenscrapers
             import xbmcgui
-            import concurrent.futures
             import resolveurl
             import operator
-            import time
 
-            self.hostDict = resolveurl.relevant_resolvers(order_matters=True)
-            progress = xbmcgui.DialogProgress()
-            sources = microjenscrapers.sources()
-            all_sources = []
+            self.hostDict = get_host_domains()
             search_title = re.sub("(\[.+?\])", "", item.get("title")) 
             do_log(f'{self.name} - search_title = \n' + str(search_title) )  
             
             if item.get("content").lower() == "movie":
-                sources = [(i[0], i[1], getattr(i[1], "movie", None)) for i in sources]
-                sources = list(filter(lambda source: source[2], sources))
-                all_sources = []
-                num_sources = len(sources)
-                counter = 0
-                progress.create(
-                    f"{addon_name}",
-                    f"Scraping for {item.get('title')}\n[I][COLOR orange](Sources : {num_sources - counter} / {num_sources} left)[/I][COLOR white] > [COLOR lawngreen]{len(all_sources)} links found[/COLOR]",
-                )
-                # progress.create(
-                    # "MicroJen",
-                    # f"Scraping for {item.get('title')}\n{num_sources}/{num_sources} left\n 0 links found",
-                # )
-                threads = [
-                    self.get_movie_source(
-                        # item.get("title"),
-                        search_title,
-                        item.get("year"),
-                        item.get("imdb_id"),
-                        i[0],
-                        i[1],
-                    )
-                    for i in sources
+                sources = microjenscrapers.sources("movie")
+                jobs = [
+                    (i[0], self._get_movie_source, (search_title, item.get("year"), item.get("imdb_id"), i[0], i[1]))
+                    for i in sources if getattr(i[1], "movie", None)
                 ]
-                for t in threads:
-                    t[0].start()
-                end_time = TIMEOUT + time.monotonic()
-                while True:
-                    if not threads:
-                        break
-                    for t in threads:
-                        if progress.iscanceled():
-                            break
-                        wait_timeout = end_time - time.monotonic()
-                        if wait_timeout < 0:
-                            break
-                        if t[0].is_alive():
-                            continue
-                        else:
-                            result = t[1]
-                            threads.remove(t)
-                            if result:
-                                all_sources.extend(result)
-                            counter += 1
-                            percent = int((counter / num_sources) * 100)
-                            progress.update(
-                                percent,
-                                f"Scraping for {item.get('title')}\n[I][COLOR orange](Sources : {num_sources - counter} / {num_sources} left)[/I][COLOR white] > [COLOR lawngreen]{len(all_sources)} links found[/COLOR]",
-                            )
-                            # progress.update(
-                                # percent,
-                                # f"Scraping for {item.get('title')}\n{num_sources - counter}/{num_sources} left\n {len(all_sources)} links found",
-                            # )
-                    else:
-                        continue
-                    break
-                progress.close()
-                all_sources = list(filter(lambda source: source, all_sources))
             elif item.get("content").lower() == "episode":
-                sources = [(i[0], i[1], getattr(i[1], "tvshow", None)) for i in sources]
-                sources = list(filter(lambda source: source[2], sources))
-                all_sources = []
-                num_sources = len(sources)
-                counter = 0
-                name = f'{item.get("tv_show_title")} - S{item.get("season")}E{item.get("episode")}'
-                progress.create(
-                    f"{addon_name}",
-                    f"Scraping for {item.get('title')}\n[I][COLOR orange](Sources : {num_sources - counter} / {num_sources} left)[/I][COLOR white] > [COLOR lawngreen]{len(all_sources)} links found[/COLOR]",
-                )
-                # progress.create(
-                    # "MicroJen",
-                    # f"Scraping for {item.get('title')}\n{num_sources}/{num_sources} left\n 0 links found",
-                # )
-                threads = [
-                    self.get_episode_source(
-                        item.get("title"),
-                        item.get("tv_show_title"),
-                        item.get("year"),
-                        item.get("imdb_id"),
-                        item.get("tmdb_id"),
-                        item.get("premiered"),
-                        item.get("season"),
-                        item.get("episode"),
+                sources = microjenscrapers.sources("tvshow")
+                jobs = [
+                    (
                         i[0],
-                        i[1],
+                        self._get_episode_source,
+                        (
+                            item.get("title"),
+                            item.get("tv_show_title"),
+                            item.get("year"),
+                            item.get("imdb_id"),
+                            item.get("tmdb_id"),
+                            item.get("premiered"),
+                            item.get("season"),
+                            item.get("episode"),
+                            i[0],
+                            i[1],
+                        ),
                     )
-                    for i in sources
+                    for i in sources if getattr(i[1], "tvshow", None)
                 ]
-                for t in threads:
-                    t[0].start()
-                end_time = TIMEOUT + time.monotonic()
-                while True:
-                    if not threads:
-                        break
-                    for t in threads:
-                        if progress.iscanceled():
-                            break
-                        wait_timeout = end_time - time.monotonic()
-                        if wait_timeout < 0:
-                            break
-                        if t[0].is_alive():
-                            continue
-                        else:
-                            result = t[1]
-                            threads.remove(t)
-                            if result:
-                                all_sources.extend(result)
-                            counter += 1
-                            percent = int((counter / num_sources) * 100)
-                            progress.update(
-                                percent,
-                                f"Scraping for {item.get('title')}\n[I][COLOR orange](Sources : {num_sources - counter} / {num_sources} left)[/I][COLOR white] > [COLOR lawngreen]{len(all_sources)} links found[/COLOR]",
-                            )
-                            # progress.update(
-                                # percent,
-                                # f"Scraping for {item.get('title')}\n{num_sources - counter}/{num_sources} left\n {len(all_sources)} links found",
-                            # )
-                    else:
-                        continue
-                    break
-                progress.close()
-                all_sources = list(filter(lambda source: source, all_sources))
+            else:
+                jobs = []
 
+            all_sources = self.scrape(item.get("title"), jobs)
             if not all_sources:
                 return False
 
             all_sources = sorted(all_sources, key=operator.itemgetter("quality"))
-            try:
-                if scrapers_setting_bool("quality.4k") is False:
-                    all_sources = [source for source in all_sources if not source["quality"] == ".4K"]
-                if scrapers_setting_bool("quality.1080p") is False:
-                    all_sources = [source for source in all_sources if not source["quality"] == "1080p"]
-                if scrapers_setting_bool("quality.720p") is False:
-                    all_sources = [source for source in all_sources if not source["quality"] == "720p"]
-                if scrapers_setting_bool("quality.sd") is False:
-                    all_sources = [source for source in all_sources if not source["quality"] == "sd"]
-                if scrapers_setting_bool("quality.cam") is False:
-                    all_sources = [source for source in all_sources if not source["quality"] == "cam"]
-            except:
-                pass
             play_sources = [
                 f"{item['origin']} - {item['source']} - {str(item['quality']).replace('.','')} - {item.get('info', 'Size Unknown')}"
                 for item in all_sources
@@ -254,69 +156,70 @@ class MicroJenScrapers(Plugin):
             item = {"title": q[1], "content": q[0], "imdb_id": q[2], "year": q[3], "link": "search"}
             self.play_video(json.dumps(item))
 
-    def get_movie_source(self, title, year, imdb, source_name, source_object):
-        from threading import Thread
+    def scrape(self, title, jobs):
+        """
+        Run the scraper jobs (name, function, args) on a bounded pool and
+        collect their sources as they complete. Stops at TIMEOUT, when the
+        dialog is cancelled or once ENOUGH_LINKS sources of an enabled
+        quality are known; unfinished scrapers are abandoned.
+        """
+        import xbmcgui
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-        result = []
-        thread = Thread(
-            target=self._get_movie_source_threaded,
-            args=(
-                title,
-                year,
-                imdb,
-                source_name,
-                source_object,
-                result,
-            ),
+        if not jobs:
+            return []
+        all_sources = []
+        num_sources = len(jobs)
+        counter = 0
+        playable = 0
+        progress = xbmcgui.DialogProgress()
+        progress.create(
+            f"{addon_name}",
+            f"Scraping for {title}\n[I][COLOR orange](Sources : {num_sources - counter} / {num_sources} left)[/I][COLOR white] > [COLOR lawngreen]{len(all_sources)} links found[/COLOR]",
         )
-        return (thread, result)
+        executor = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS)
+        pending = {executor.submit(function, *args): name for name, function, args in jobs}
+        end_time = TIMEOUT + time.monotonic()
+        try:
+            while pending and playable < ENOUGH_LINKS:
+                wait_timeout = end_time - time.monotonic()
+                if wait_timeout <= 0 or progress.iscanceled():
+                    break
+                # Wake up at least twice a second to notice a cancel
+                done, _ = wait(pending, timeout=min(wait_timeout, 0.5), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        do_log(f"{self.name} - {name} failed: {e}")
+                        result = None
+                    if result:
+                        result = [source for source in result if source]
+                        all_sources.extend(result)
+                        playable += sum(1 for source in result if allowed_quality(source))
+                    counter += 1
+                    percent = int((counter / num_sources) * 100)
+                    progress.update(
+                        percent,
+                        f"Scraping for {title}\n[I][COLOR orange](Sources : {num_sources - counter} / {num_sources} left)[/I][COLOR white] > [COLOR lawngreen]{len(all_sources)} links found[/COLOR]",
+                    )
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+            progress.close()
+        return [source for source in all_sources if allowed_quality(source)]
 
-    def _get_movie_source_threaded(
-        self, title, year, imdb, source_name, source_object, outlist
-    ):
+    def _get_movie_source(self, title, year, imdb, source_name, source_object):
         url = source_object.movie(imdb, title, title, "", year)
         sources = source_object.sources(url, self.hostDict, self.hostprDict)
         if sources:
             for item in sources:
                 item["origin"] = source_name
-            outlist.extend(sources)
         return sources
 
-    def get_episode_source(
-        self,
-        title,
-        tv_show_title,
-        year,
-        imdb,
-        tmdb,
-        premiered,
-        season,
-        episode,
-        source_name,
-        source_object,
-    ):
-        from threading import Thread
-
-        result = []
-        thread = Thread(
-            target=self._get_episode_source_threaded,
-            args=(
-                title,
-                tv_show_title,
-                year,
-                imdb,
-                tmdb,
-                premiered,
-                season,
-                episode,
-                source_name,
-                source_object,
-                result,
-            ),
-        )
-        return (thread, result)
-
-    def _get_episode_source_threaded(
+    def _get_episode_source(
         self,
         title,
         tv_show_title,
@@ -328,7 +231,6 @@ class MicroJenScrapers(Plugin):
         episode,
         source_name,
         source_object,
-        outlist,
     ):
         tv_show_url = source_object.tvshow(
             imdb, tmdb, tv_show_title, tv_show_title, "", year
@@ -340,5 +242,43 @@ class MicroJenScrapers(Plugin):
         if sources:
             for item in sources:
                 item["origin"] = source_name
-            outlist.extend(sources)
         return sources
+
+
+def get_host_domains():
+    """
+    Domains of the enabled resolveurl resolvers, in resolver order, as the
+    scrapers' hostDict. Looking the resolvers up imports every resolveurl
+    plugin, so the list is kept for the rest of the process.
+    """
+    global _host_domains
+    if _host_domains is None:
+        import resolveurl
+        _host_domains = [
+            domain
+            for resolver in resolveurl.relevant_resolvers(order_matters=True)
+            for domain in resolver.domains
+            if "*" not in domain
+        ]
+    return _host_domains
+
+
+def allowed_quality(source):
+    """False for sources whose quality is switched off in the scraper settings."""
+    try:
+        return source["quality"] not in disabled_qualities()
+    except Exception:
+        return True
+
+
+def disabled_qualities():
+    global _disabled_qualities
+    if _disabled_qualities is None:
+        _disabled_qualities = set()
+        try:
+            for setting, quality in QUALITY_SETTINGS:
+                if scrapers_setting_bool(setting) is False:
+                    _disabled_qualities.add(quality)
+        except:
+            pass
+    return _disabled_qualities
@@ -2,7 +2,7 @@ from ..plugin import Plugin
 from ..DI import DI
 import requests, xbmcgui
 from bs4 import BeautifulSoup
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 
 class NginxDir(Plugin):
     name = "nginx_dir"
@@ -43,6 +43,6 @@ class NginxDir(Plugin):
                     jen_data["link"] = dir + href
                 jen_list.append(jen_data)
             
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
\ No newline at end of file
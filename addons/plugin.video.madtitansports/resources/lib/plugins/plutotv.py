@@ -1,7 +1,7 @@
 from ..plugin import Plugin
 import xml.etree.ElementTree as ET
 import xbmcgui, requests, datetime, time, uuid
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 from unidecode import unidecode
 
 
@@ -112,6 +112,6 @@ class plutotv(Plugin):
                 }
                 jen_list.append(jen_data)
             jen_list.sort(key=lambda x: x["number"])
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list)
             run_hook("display_list", jen_list)
\ No newline at end of file
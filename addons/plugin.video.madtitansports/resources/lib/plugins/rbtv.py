@@ -9,7 +9,7 @@ from pyamf import remoting, AMF3
 from pyamf.flex import messaging
 from ..plugin import Plugin
 from ..util.dialogs import link_dialog
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 
 try:
     from Cryptodome.Cipher import AES
@@ -58,7 +58,7 @@ class RBTV(Plugin):
                 "type": "dir",
             } for category in self.json_config["categories"]]
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
             run_hook("display_list", jen_list)
         
         @plugin.route("/rbtv/category/<category>")
@@ -73,8 +73,8 @@ class RBTV(Plugin):
                 "type": "item"
             } for video in videos]
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list)
             run_hook("display_list", jen_list)
     
     def play_video(self, video: str):
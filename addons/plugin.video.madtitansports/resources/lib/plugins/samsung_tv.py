@@ -1,7 +1,7 @@
 from ..plugin import Plugin
 from ..DI import DI
 import requests, json, xbmcgui
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 
 class samsung_tv(Plugin):
     name = "Samsung TV Plus"
@@ -38,8 +38,8 @@ class samsung_tv(Plugin):
                 }
                 jen_list.append(jen_data)
             
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
         
         @plugin.route("/samsung_tv/region/<region>")
@@ -82,6 +82,6 @@ class samsung_tv(Plugin):
                 jen_list.append(jen_data)
             
             jen_list = list(sorted(jen_list, key=lambda x: x["title"]))
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
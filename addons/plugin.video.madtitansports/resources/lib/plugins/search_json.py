@@ -5,7 +5,7 @@ import requests
 from ..util.dialogs import link_dialog, remove_name
 from ..plugin import Plugin
 import xbmcgui
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 from resources.lib import k
 from xbmcvfs import translatePath
 import xbmcaddon
@@ -106,8 +106,8 @@ class SearchJSON(Plugin):
 
                 run_hook("play_video", json.dumps(item))
             else:
-                jen_list = [run_hook("process_item", item) for item in jen_list]
-                jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+                jen_list = run_hook_many("process_item", jen_list)
+                jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
                 run_hook("display_list", jen_list)
 
         @plugin.route(f"/{self.name}/cache")
@@ -123,8 +123,8 @@ class SearchJSON(Plugin):
                         "type": "dir",
                         self.name: f"cache/{i}"
                     })
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
 
         @plugin.route(f"/{self.name}/cache/<entry>")
@@ -134,8 +134,8 @@ class SearchJSON(Plugin):
             with open(cache_path, "r") as f:
                 items = json.load(f)
             jen_list = items[entry]["items"]
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
 
         @plugin.route(f"/{self.name}/clear")
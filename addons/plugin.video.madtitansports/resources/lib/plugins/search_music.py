@@ -3,7 +3,7 @@ from ..plugin import Plugin
 from ..DI import DI
 import requests, xbmcgui, json, xbmc
 from bs4 import BeautifulSoup
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 from resources.lib import k
 import urllib
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -102,8 +102,8 @@ class SearchJSON(Plugin):
                     item["link"] = item["link"][idx]
                 run_hook("play_video", json.dumps(item))
             else:
-                jen_list = [run_hook("process_item", item) for item in jen_list]
-                jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+                jen_list = run_hook_many("process_item", jen_list)
+                jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
                 run_hook("display_list", jen_list)
 
 
@@ -1,7 +1,7 @@
 from ..plugin import Plugin
 from ..DI import DI
 import requests, xbmcgui
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 
 class stirr(Plugin):
     name = "stirr"
@@ -36,8 +36,8 @@ class stirr(Plugin):
                 }
                 jen_list.append(jen_data)
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
         
         @plugin.route(f"/{self.name}/group/<group>")
@@ -82,6 +82,6 @@ class stirr(Plugin):
                 jen_list.append(jen_data)
             
             jen_list = list(sorted(jen_list, key=lambda x: x["title"]))
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
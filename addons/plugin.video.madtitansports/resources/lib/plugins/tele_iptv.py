@@ -6,6 +6,10 @@ import xbmc, xbmcgui, xbmcaddon
 from xbmcvfs import translatePath
 from ..plugin import Plugin
 from ..util.dialogs import link_dialog
+from ..util.server_validation import validate_servers
+from ..util.iptv_db import (
+    connect_db, connect_ingest_db, init_search_index, search_channel_rows, sync_server_channels,
+)
 from resources.lib.plugin import run_hook
 
 # Get addon paths
@@ -40,6 +44,10 @@ DEFAULT_CONFIG = {
         "ARG:",
         "MEX:"
     ],
+    # How many servers to validate in parallel during an update run
+    "validation_workers": 8,
+    # Max parallel validations against the same panel host
+    "validation_per_host": 2,
     # Whether to test stream URLs during validation
     "stream_check_enabled": True,
     # How many candidate channels to test per server when stream_check_enabled is True
@@ -118,7 +126,7 @@ def save_recent_search(term, country):
 
 def init_db():
     """Initialize the database"""
-    with sqlite3.connect(DB_PATH) as conn:
+    with connect_db(DB_PATH) as conn:
         conn.execute("""
             CREATE TABLE IF NOT EXISTS servers (
                 address TEXT,
@@ -143,6 +151,7 @@ def init_db():
             )
         """)
         conn.commit()
+        init_search_index(conn)
 
 def clean_string(s):
     """Clean string for searching"""
@@ -425,42 +434,36 @@ def validate_server(server):
 def store_server_channels(server, panel_data):
     """Store server and its channels in database"""
     address, username, password = server
-    
+
+    exclude_groups = [g.lower() for g in config.get("exclude_groups", [])]
+    exclude_names = [n.lower() for n in config.get("exclude_names", [])]
+    channels = {}
+    for channel in panel_data.get("available_channels", {}).values():
+        name = (channel.get("name") or "").strip()
+        if not name:
+            continue
+
+        # Skip if name matches any excluded name pattern
+        name_l = name.lower()
+        if any(ex in name_l for ex in exclude_names):
+            continue
+
+        category = (channel.get("category_name") or "").strip().lower()
+        if any(ex in category for ex in exclude_groups):
+            continue
+
+        channels[str(channel["stream_id"])] = (name, clean_string(name))
+
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            # Mark server as valid
+        # Mark server as valid and apply the channel diff in one transaction
+        with connect_ingest_db(DB_PATH) as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO servers (address, username, password, last_checked, is_valid)
                 VALUES (?, ?, ?, ?, 1)
             """, (address, username, password, int(time.time())))
-            
-            # Store channels
-            exclude_groups = [g.lower() for g in config.get("exclude_groups", [])]
-            exclude_names = [n.lower() for n in config.get("exclude_names", [])]
-            for channel in panel_data.get("available_channels", {}).values():
-                name = (channel.get("name") or "").strip()
-                if not name:
-                    continue
+            added, changed, removed = sync_server_channels(conn, server, channels)
 
-                # Skip if name matches any excluded name pattern
-                name_l = name.lower()
-                if any(ex in name_l for ex in exclude_names):
-                    continue
-                
-                category = (channel.get("category_name") or "").strip().lower()
-                if any(ex in category for ex in exclude_groups):
-                    continue
-                
-                search = clean_string(name)
-                conn.execute("""
-                    INSERT OR REPLACE INTO channels 
-                    (address, username, password, stream_id, name, search)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (address, username, password, channel["stream_id"], name, search))
-            
-            conn.commit()
-        
-        xbmc.log(f"[tele_iptv] Stored channels for: {address}", xbmc.LOGINFO)
+        xbmc.log(f"[tele_iptv] Stored channels for: {address} (+{added} ~{changed} -{removed})", xbmc.LOGINFO)
         return True
         
     except Exception as e:
@@ -473,51 +476,20 @@ def search_channels(term, limit=20, per_address=5, country_filter=None):
     # Log the raw and cleaned search terms for debugging (optional)
     if config.get("debug_logging", False):
         xbmc.log(f"[tele_iptv] search term='{term}' cleaned='{cleaned}'", xbmc.LOGINFO)
-    like_pattern = f"%{cleaned}%"
 
-    with sqlite3.connect(DB_PATH) as conn:
+    # Substring match, country filter and the digit rule are all resolved
+    # by the FTS query.
+    with connect_db(DB_PATH) as conn:
         conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT c.address, c.username, c.password, c.stream_id, c.name, c.search
-            FROM channels c
-            JOIN servers s ON c.address = s.address 
-                          AND c.username = s.username 
-                          AND c.password = s.password
-            WHERE s.is_valid = 1 AND c.search LIKE ?
-            ORDER BY LENGTH(c.search) - LENGTH(?)
-        """, (like_pattern, cleaned))
-
-        rows = cur.fetchall()
-
-    if config.get("debug_logging", False):
-        xbmc.log(f"[tele_iptv] total DB matches before filter: {len(rows)}", xbmc.LOGINFO)
-
-    # Optional country filter based on original channel name
-    if country_filter:
-        cf = country_filter.strip().lower()
-        if cf:
-            rows = [
-                r for r in rows
-                if cf in (r["name"] or "").lower()
-            ]
-            if config.get("debug_logging", False):
-                xbmc.log(
-                    f"[tele_iptv] matches after country filter '{cf}': {len(rows)}",
-                    xbmc.LOGINFO,
-                )
-
-    # Check if query ends with digit
-    is_digit = cleaned[-1].isdigit() if cleaned else False
-
-    # Filter rows by digit rule
-    filtered = [
-        r for r in rows
-        if is_digit or not re.match(re.escape(cleaned) + r"\d", r["search"], re.IGNORECASE)
-    ]
+        filtered = search_channel_rows(
+            conn,
+            cleaned,
+            "c.address, c.username, c.password, c.stream_id, c.name, c.search",
+            country_filter=country_filter,
+        )
 
     if config.get("debug_logging", False):
-        xbmc.log(f"[tele_iptv] matches after digit-filter: {len(filtered)}", xbmc.LOGINFO)
+        xbmc.log(f"[tele_iptv] matches: {len(filtered)} (country='{country_filter or ''}')", xbmc.LOGINFO)
 
     # Limit per address
     results = []
@@ -674,7 +646,7 @@ class TeleIPTV(Plugin):
                 country_filter, term = query.split(":::", 1)
 
             # Check if we have any servers in DB
-            with sqlite3.connect(DB_PATH) as conn:
+            with connect_db(DB_PATH) as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT COUNT(*) FROM servers WHERE is_valid = 1")
                 server_count = cur.fetchone()[0]
@@ -736,7 +708,7 @@ class TeleIPTV(Plugin):
         @plugin.route(f"/{self.name}/manage_servers")
         def manage_servers():
             """List and delete specific servers from the DB"""
-            with sqlite3.connect(DB_PATH) as conn:
+            with connect_db(DB_PATH) as conn:
                 conn.row_factory = sqlite3.Row
                 cur = conn.cursor()
                 cur.execute("""
@@ -780,7 +752,7 @@ class TeleIPTV(Plugin):
             
                 # Delete from channels first, then servers
                 try:
-                    with sqlite3.connect(DB_PATH) as conn:
+                    with connect_db(DB_PATH) as conn:
                         cur = conn.cursor()
                         cur.execute("""
                             DELETE FROM channels 
@@ -967,7 +939,7 @@ class TeleIPTV(Plugin):
 
         # Add new servers to DB if any
         if servers:
-            with sqlite3.connect(DB_PATH) as conn:
+            with connect_db(DB_PATH) as conn:
                 cur = conn.cursor()
                 cur.execute("SELECT address, username, password FROM servers")
                 existing = set(cur.fetchall())
@@ -980,7 +952,7 @@ class TeleIPTV(Plugin):
                 conn.commit()
 
         # Get unvalidated or stale servers
-        with sqlite3.connect(DB_PATH) as conn:
+        with connect_db(DB_PATH) as conn:
             cur = conn.cursor()
             cur.execute("""
                 SELECT address, username, password 
@@ -1000,32 +972,39 @@ class TeleIPTV(Plugin):
         total_to_validate = len(to_validate)
         dialog.update(50, f"Validating {total_to_validate} servers...")
 
-        validated = 0
-        invalidated = 0
-        
-        # Validate servers
-        validated = 0
-        for i, server in enumerate(to_validate):
-            if dialog.iscanceled():
-                break
-            
-            dialog.update(50 + int(40 * i / len(to_validate)), 
-                        f"Validating server {i+1}/{len(to_validate)}...")
-            
-            panel_data = validate_server(server)
+        stats = {"validated": 0, "invalidated": 0}
+
+        def commit(server, panel_data):
+            # Runs on the single writer thread of validate_servers()
             if panel_data:
                 store_server_channels(server, panel_data)
-                validated += 1
+                stats["validated"] += 1
             else:
                 # FIX: Mark as checked but invalid to avoid re-validation soon
-                with sqlite3.connect(DB_PATH) as conn:
+                with connect_db(DB_PATH) as conn:
                     conn.execute("""
                         UPDATE servers 
                         SET last_checked = ? 
                         WHERE address = ? AND username = ? AND password = ?
                     """, (int(time.time()), *server))
-                conn.commit()
+                    conn.commit()
                 xbmc.log(f"[tele_iptv] Marked invalid: {server[0]}", xbmc.LOGINFO)
+
+        def progress(done, total):
+            dialog.update(50 + int(40 * done / total),
+                          f"Validated {done}/{total} servers...")
+
+        validate_servers(
+            to_validate,
+            validate_server,
+            commit,
+            workers=int(config.get("validation_workers", 8) or 1),
+            per_host=int(config.get("validation_per_host", 2) or 1),
+            progress=progress,
+            is_canceled=dialog.iscanceled,
+        )
+        validated = stats["validated"]
+        invalidated = stats["invalidated"]
         
         dialog.update(100, "Update complete")
         dialog.close()
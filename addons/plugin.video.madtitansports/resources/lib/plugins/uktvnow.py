@@ -4,7 +4,7 @@ from xbmcvfs import translatePath
 from base64 import b64encode, b64decode
 from binascii import a2b_hex
 from requests.sessions import HTTPAdapter
-from resources.lib.plugin import Plugin, run_hook
+from resources.lib.plugin import Plugin, run_hook, run_hook_many
 from resources.lib.util.dialogs import link_dialog
 try:
     from Crypto.Cipher import DES, PKCS1_v1_5
@@ -62,7 +62,7 @@ class UKTVNow(Plugin):
                 "type": "dir",
             } for category in self.json_config["categories"]]
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
             run_hook("display_list", jen_list)
         
         @plugin.route("/uktvnow/category/<category>")
@@ -77,8 +77,8 @@ class UKTVNow(Plugin):
                 "type": "item"
             } for channel in channels]
 
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list)
             run_hook("display_list", jen_list)
         
         @plugin.route("/uktvnow/play/<pk_id>")
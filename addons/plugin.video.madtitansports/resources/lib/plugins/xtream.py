@@ -1,7 +1,11 @@
 from resources.lib.plugin import Plugin
-from resources.lib.plugin import run_hook
-import requests, xbmcgui, xbmcaddon, os, xbmc
+from resources.lib.plugin import run_hook, run_hook_many
+import xbmcgui, xbmcaddon, os, xbmc
 from xbmcvfs import translatePath
+from resources.lib.util.panel_snapshot import PanelSnapshots
+
+# Parsed panel_api.php per server, so moving between categories is a local lookup
+panels = PanelSnapshots()
 
 class xtream(Plugin):
     name = "xtream"
@@ -83,23 +87,21 @@ class xtream(Plugin):
             if username == None or password == None:
                 username = plugin.args["username"][0]
                 password = plugin.args["password"][0]
-            r = requests.get(url + f"/panel_api.php?username={username}&password={password}").json()
             jen_list = []
-            for key, value in r["categories"].items():
-                for cat in value:
-                    jen_list.append({
-                        "title": f"{key.capitalize()} | {cat['category_name']}",
-                        self.name: {
-                            "address": url,
-                            "username": username,
-                            "password": password,
-                            "action": "category",
-                            "cat": cat["category_id"]
-                        },
-                        "type": "dir"
-                    })
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            for key, category_name, category_id in panels.categories(url, username, password):
+                jen_list.append({
+                    "title": f"{key.capitalize()} | {category_name}",
+                    self.name: {
+                        "address": url,
+                        "username": username,
+                        "password": password,
+                        "action": "category",
+                        "cat": category_id
+                    },
+                    "type": "dir"
+                })
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
         
         @plugin.route(f"/{self.name}/category/<path:url>")
@@ -107,16 +109,14 @@ class xtream(Plugin):
             username = plugin.args["username"][0]
             password = plugin.args["password"][0]
             category = plugin.args["cat"][0]
-            r = requests.get(url + f"/panel_api.php?username={username}&password={password}").json()
             jen_list = []
-            for channel_id, channel in r["available_channels"].items():
-                if channel["category_id"] != category: continue
+            for channel_id, name, icon in panels.streams(url, username, password, category):
                 jen_list.append({
-                    "title": channel["name"],
-                    "icon": channel["stream_icon"],
+                    "title": name,
+                    "icon": icon,
                     "sportjetextractors": [f"jetproxy://{url}/live/{username}/{password}/{channel_id}.m3u8?&Connection=keep-alive|X-Forwarded-For=24.37.42.200"],
                     "type": "item"
                 })
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
@@ -1,5 +1,5 @@
 import json
-from resources.lib.plugin import run_hook
+from resources.lib.plugin import run_hook, run_hook_many
 from resources.lib.util.dialogs import link_dialog
 from ..plugin import Plugin
 import xbmcgui, requests
@@ -49,8 +49,8 @@ class xtream_server(Plugin):
             jen_list = self.search_query(country, plugin.args["query"][0] if "query" in plugin.args else None)
             if not jen_list:
                 return
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
         
         @plugin.route(f"/{self.name}/search_dialog/<country>")
@@ -1,6 +1,6 @@
 import xbmc, xbmcaddon, xbmcgui, requests
 from bs4 import BeautifulSoup
-from ..plugin import Plugin, run_hook
+from ..plugin import Plugin, run_hook, run_hook_many
 from tabulate import tabulate
 
 CACHE_TIME = 0  # change to wanted cache time in seconds
@@ -337,7 +337,7 @@ class YahooScores(Plugin):
         @plugin.route(f"/{self.name}/links/<sport>")
         def yahoo_links(sport: str):
             jen_list = scoreboard_links(sport)
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list)
             run_hook("display_list", jen_list)
 
@@ -2,7 +2,7 @@ import json
 import re
 import xbmc
 import xbmcgui
-from ..plugin import Plugin, run_hook
+from ..plugin import Plugin, run_hook, run_hook_many
 from ..DI import DI
 # from ..external import yt_dlp
 
@@ -105,8 +105,8 @@ class youtube(Plugin):
                 "type": "item"
             } for entry in info["entries"]]
             
-            jen_list = [run_hook("process_item", item) for item in jen_list]
-            jen_list = [run_hook("get_metadata", item, return_item_on_failure=True) for item in jen_list]
+            jen_list = run_hook_many("process_item", jen_list)
+            jen_list = run_hook_many("get_metadata", jen_list, return_item_on_failure=True)
             run_hook("display_list", jen_list)
 
         @plugin.route("/ytdlp/play/<path:yt_id>")
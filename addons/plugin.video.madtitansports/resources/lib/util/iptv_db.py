@@ -0,0 +1,169 @@
+import sqlite3
+
+import xbmc
+
+
+def connect_db(path):
+    """
+    Open an IPTV channel database.
+
+    recursive_triggers makes the rows removed by INSERT OR REPLACE fire the
+    delete trigger, which keeps channels_fts in sync with channels.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA recursive_triggers = ON")
+    return conn
+
+
+def connect_ingest_db(path):
+    """
+    Open a connection for bulk channel writes: WAL so searches are not
+    blocked while a server is being refreshed, and synchronous=NORMAL so
+    each per-server transaction costs one fsync at most.
+    """
+    conn = connect_db(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def sync_server_channels(conn, server, channels, columns=("name", "search")):
+    """
+    Make the channels stored for ``server`` match ``channels``, a mapping of
+    stream_id -> tuple of values for ``columns``. stream_id is a TEXT
+    column, so keys must be strings for the diff to line up.
+
+    Only the difference against what is stored is written: rows for streams
+    that disappeared are deleted, new streams inserted and changed ones
+    updated, each with a single executemany. The caller owns the
+    transaction. Returns (inserted, updated, deleted) counts.
+    """
+    address, username, password = server
+    key = (address, username, password)
+    stored = {}
+    for row in conn.execute(
+        f"SELECT stream_id, {', '.join(columns)} FROM channels WHERE address = ? AND username = ? AND password = ?",
+        key,
+    ):
+        stored[row[0]] = tuple(row[1:])
+
+    deleted = [key + (stream_id,) for stream_id in stored if stream_id not in channels]
+    inserted = []
+    updated = []
+    for stream_id, values in channels.items():
+        values = tuple(values)
+        if stream_id not in stored:
+            inserted.append(key + (stream_id,) + values)
+        elif stored[stream_id] != values:
+            updated.append(values + key + (stream_id,))
+
+    if deleted:
+        conn.executemany(
+            "DELETE FROM channels WHERE address = ? AND username = ? AND password = ? AND stream_id = ?",
+            deleted,
+        )
+    if inserted:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO channels (address, username, password, stream_id, {', '.join(columns)}) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' for _ in columns)})",
+            inserted,
+        )
+    if updated:
+        conn.executemany(
+            f"UPDATE channels SET {', '.join(c + ' = ?' for c in columns)} "
+            "WHERE address = ? AND username = ? AND password = ? AND stream_id = ?",
+            updated,
+        )
+    return len(inserted), len(updated), len(deleted)
+
+
+def init_search_index(conn):
+    """
+    Create the trigram FTS5 index over channels.search (already normalized
+    by clean_string() at insert time) plus the triggers that keep it in
+    sync. Returns False when this sqlite build has no FTS5/trigram support,
+    in which case searches fall back to LIKE.
+    """
+    if has_search_index(conn):
+        return True
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE channels_fts
+            USING fts5(search, content='channels', content_rowid='rowid', tokenize='trigram')
+        """)
+    except sqlite3.OperationalError as e:
+        xbmc.log(f"[iptv_db] FTS5 trigram index unavailable, using LIKE search: {e}", xbmc.LOGINFO)
+        return False
+    conn.executescript("""
+        CREATE TRIGGER IF NOT EXISTS channels_fts_ai AFTER INSERT ON channels BEGIN
+            INSERT INTO channels_fts(rowid, search) VALUES (new.rowid, new.search);
+        END;
+        CREATE TRIGGER IF NOT EXISTS channels_fts_ad AFTER DELETE ON channels BEGIN
+            INSERT INTO channels_fts(channels_fts, rowid, search) VALUES ('delete', old.rowid, old.search);
+        END;
+        CREATE TRIGGER IF NOT EXISTS channels_fts_au AFTER UPDATE OF search ON channels BEGIN
+            INSERT INTO channels_fts(channels_fts, rowid, search) VALUES ('delete', old.rowid, old.search);
+            INSERT INTO channels_fts(rowid, search) VALUES (new.rowid, new.search);
+        END;
+    """)
+    conn.execute("INSERT INTO channels_fts(channels_fts) VALUES ('rebuild')")
+    conn.commit()
+    return True
+
+
+def has_search_index(conn):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'channels_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def _like_escape(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_channel_rows(conn, cleaned, columns, conditions=(), country_filter=None,
+                        exclude_name_words=(), allow_digit_suffix=None):
+    """
+    Return channel rows (joined with their server as ``s``) whose normalized
+    ``search`` column contains ``cleaned``, shortest match first.
+
+    conditions is a list of (sql, params) pairs ANDed into the WHERE clause.
+    The country filter and excluded name words are substring matches on the
+    original channel name, checked only on the rows the search term matched;
+    they depend on the query, so they are not part of the index. Unless allow_digit_suffix is True (the default
+    when ``cleaned`` ends with a digit), names that continue the term with
+    a digit (e.g. "espn2" for "espn") are dropped.
+    """
+    where = [("s.is_valid = 1", ())] + list(conditions)
+
+    # Trigram tokens need at least three characters
+    if len(cleaned) >= 3 and has_search_index(conn):
+        source = "channels_fts f JOIN channels c ON c.rowid = f.rowid"
+        where.append(("channels_fts MATCH ?", (f'search:"{cleaned}"',)))
+    else:
+        source = "channels c"
+        where.append(("c.search LIKE ? ESCAPE '\\'", (f"%{_like_escape(cleaned)}%",)))
+
+    cf = (country_filter or "").strip().lower()
+    if cf:
+        where.append(("c.name LIKE ? ESCAPE '\\'", (f"%{_like_escape(cf)}%",)))
+    for word in exclude_name_words:
+        where.append(("COALESCE(c.name, '') NOT LIKE ? ESCAPE '\\'", (f"%{_like_escape(word)}%",)))
+
+    if allow_digit_suffix is None:
+        allow_digit_suffix = cleaned[-1].isdigit() if cleaned else False
+    if cleaned and not allow_digit_suffix:
+        where.append(("c.search NOT GLOB ?", (f"{cleaned}[0-9]*",)))
+
+    sql = f"""
+        SELECT {columns}
+        FROM {source}
+        JOIN servers s ON c.address = s.address
+                      AND c.username = s.username
+                      AND c.password = s.password
+        WHERE {' AND '.join(clause for clause, _ in where)}
+        ORDER BY LENGTH(c.search)
+    """
+    params = [p for _, clause_params in where for p in clause_params]
+    return conn.execute(sql, params).fetchall()
@@ -0,0 +1,212 @@
+"""
+Single-pass M3U parsing and a persistent per-playlist category index.
+
+parse_m3u() walks the playlist once, tokenizing each #EXTINF entry and its
+attributes with one scanner. M3UIndex stores the parsed entries grouped by
+category (one row per group-title) in sqlite, keyed by playlist URL together with the response's ETag /
+Last-Modified and a digest of its text, so opening a category is an indexed
+lookup instead of a download and full re-parse. When the server answers a
+conditional request with 304, rebuild() turns the index back into playlist
+text, so no copy of the original text is kept.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import xbmc
+import xbmcaddon
+from xbmcvfs import translatePath
+
+ATTR_RE = re.compile(r'([\w-]+)=["\']([^"\']*)["\']')
+# One #EXTINF entry: attributes (commas only inside quotes), title, then the
+# first following line that is not blank or an option (#EXTVLCOPT, ...).
+ENTRY_RE = re.compile(
+    r'^[ \t]*#EXTINF:?([^,"\n]*(?:"[^"\n]*"[^,"\n]*)*),?([^\n]*)\n'
+    r'(?:[ \t\r]*(?:#(?!EXTINF)[^\n]*)?\n)*'
+    r'[ \t]*([^#\s][^\n]*)',
+    re.M,
+)
+META_ATTRS = ("tvg-id", "tvg-name", "tvg-country", "tvg-language", "tvg-logo", "group-title")
+# Playlists not refreshed for this long are dropped from the index
+MAX_AGE = 30 * 24 * 60 * 60
+# First line of a playlist written by rebuild(), naming the digest of the text it was indexed from
+REBUILT_HEADER = '#EXTM3U x-m3u-index-digest="{}"\n'
+
+
+def parse_m3u(text):
+    """
+    Yield (attrs, title, stream_url) for every #EXTINF entry of ``text``.
+
+    attrs maps attribute names to their unstripped values and title is the
+    text after the attributes. Entries without a stream URL are skipped.
+    """
+    findall = ATTR_RE.findall
+    for raw_attrs, title, stream_url in ENTRY_RE.findall(text):
+        yield dict(findall(raw_attrs)), title.strip(), stream_url.strip()
+
+
+def digest(text):
+    return hashlib.md5(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+class M3UIndex:
+    def __init__(self, path=None):
+        if path is None:
+            profile = translatePath(xbmcaddon.Addon().getAddonInfo("profile"))
+            path = os.path.join(profile, "m3u_index.db")
+        self.path = path
+        self.con = None
+        self.lock = threading.Lock()
+        self.indexed = {}
+
+    def connect(self):
+        if self.con is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            con = sqlite3.connect(self.path, check_same_thread=False)
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute("PRAGMA synchronous = NORMAL")
+            con.executescript("""
+                CREATE TABLE IF NOT EXISTS playlists (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT UNIQUE,
+                    digest TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    has_meta INTEGER,
+                    first_title TEXT,
+                    has_ts INTEGER,
+                    updated INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS groups (
+                    playlist INTEGER,
+                    name TEXT,
+                    entries TEXT,
+                    PRIMARY KEY (playlist, name)
+                );
+            """)
+            self.con = con
+        return self.con
+
+    def playlist(self, url):
+        """Stored metadata of ``url`` as a dict, or None."""
+        keys = ("id", "digest", "etag", "last_modified", "has_meta", "first_title", "has_ts")
+        with self.lock:
+            row = self.connect().execute(
+                f"SELECT {', '.join(keys)} FROM playlists WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(keys, row))
+
+    def conditional_headers(self, url):
+        meta = self.playlist(url)
+        headers = {}
+        if meta:
+            if meta["etag"]:
+                headers["If-None-Match"] = meta["etag"]
+            if meta["last_modified"]:
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def update(self, url, text, etag=None, last_modified=None):
+        """Parse ``text`` and store it as the current content of ``url``."""
+        groups = {}
+        has_meta = False
+        first_title = None
+        for attrs, title, link in parse_m3u(text):
+            if first_title is None:
+                first_title = title
+            if not has_meta and any(a in attrs for a in META_ATTRS):
+                has_meta = True
+            get = attrs.get
+            name = get("tvg-name", "").strip() or title
+            if "like gecko" in name.lower():
+                continue
+            group = get("group-title", "").strip() or get("tvg-country", "").strip() or "Uncategorized"
+            groups.setdefault(group, []).append((name, link, get("tvg-logo", "").strip()))
+
+        text_digest = digest(text)
+        with self.lock:
+            con = self.connect()
+            try:
+                with con:
+                    con.execute(
+                        """INSERT OR REPLACE INTO playlists
+                           (id, url, digest, etag, last_modified, has_meta, first_title, has_ts, updated)
+                           VALUES((SELECT id FROM playlists WHERE url = ?), ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        (url, url, text_digest, etag, last_modified, int(has_meta),
+                         first_title, int(".ts" in text), int(time.time())),
+                    )
+                    playlist_id = con.execute("SELECT id FROM playlists WHERE url = ?", (url,)).fetchone()[0]
+                    con.execute("DELETE FROM groups WHERE playlist = ?", (playlist_id,))
+                    con.executemany(
+                        "INSERT INTO groups(playlist, name, entries) VALUES(?, ?, ?)",
+                        ((playlist_id, name, json.dumps(entries)) for name, entries in groups.items()),
+                    )
+                    self._prune(con)
+            except sqlite3.Error as e:
+                xbmc.log(f"[m3u_index] Failed to index {url}: {e}", xbmc.LOGERROR)
+                return False
+            self.indexed[url] = text
+        return True
+
+    def _prune(self, con):
+        cutoff = int(time.time()) - MAX_AGE
+        con.execute(
+            "DELETE FROM groups WHERE playlist IN (SELECT id FROM playlists WHERE updated < ?)", (cutoff,)
+        )
+        con.execute("DELETE FROM playlists WHERE updated < ?", (cutoff,))
+
+    def sync(self, url, text):
+        """Make sure the index of ``url`` reflects ``text``, re-parsing only if it changed."""
+        if self.indexed.get(url) is text:
+            return True
+        meta = self.playlist(url)
+        if meta and (text.startswith(REBUILT_HEADER.format(meta["digest"])) or meta["digest"] == digest(text)):
+            self.indexed[url] = text
+            return True
+        return self.update(url, text)
+
+    def rebuild(self, url):
+        """
+        The indexed entries of ``url`` as playlist text, or None if it is not
+        indexed. sync() takes the result as the indexed content for as long
+        as the playlist is unchanged.
+        """
+        with self.lock:
+            con = self.connect()
+            row = con.execute("SELECT id, digest FROM playlists WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            groups = con.execute(
+                "SELECT name, entries FROM groups WHERE playlist = ? ORDER BY rowid", (row[0],)
+            ).fetchall()
+        # Attribute values never contain quotes, ATTR_RE stops at them
+        lines = [REBUILT_HEADER.format(row[1])]
+        for name, entries in groups:
+            for title, link, thumbnail in json.loads(entries):
+                lines.append(f'#EXTINF:-1 tvg-logo="{thumbnail}" group-title="{name}",{title}\n{link}\n')
+        text = "".join(lines)
+        self.indexed[url] = text
+        return text
+
+    def categories(self, url):
+        with self.lock:
+            rows = self.connect().execute(
+                "SELECT g.name FROM groups g JOIN playlists p ON p.id = g.playlist WHERE p.url = ?", (url,)
+            ).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def entries(self, url, category):
+        """(title, link, thumbnail) of every entry in ``category``, in playlist order."""
+        with self.lock:
+            row = self.connect().execute(
+                """SELECT g.entries FROM groups g JOIN playlists p ON p.id = g.playlist
+                   WHERE p.url = ? AND g.name = ?""",
+                (url, category),
+            ).fetchone()
+        return json.loads(row[0]) if row else []
@@ -0,0 +1,153 @@
+"""
+Per-server snapshots of Xtream panel_api.php responses.
+
+A panel is downloaded and parsed once, then kept in sqlite as its category
+list plus one row of streams per category_id. Until the snapshot is older
+than the TTL, browsing categories is a local lookup; after that the panel is
+re-requested, conditionally when the server sent an ETag or Last-Modified.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+import xbmc
+import xbmcaddon
+from xbmcvfs import translatePath
+
+
+class PanelSnapshots:
+    def __init__(self, path=None, timeout=30):
+        if path is None:
+            profile = translatePath(xbmcaddon.Addon().getAddonInfo("profile"))
+            path = os.path.join(profile, "xtream_panels.db")
+        self.path = path
+        self.timeout = timeout
+        self.con = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.con is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            con = sqlite3.connect(self.path, check_same_thread=False)
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute("PRAGMA synchronous = NORMAL")
+            con.executescript("""
+                CREATE TABLE IF NOT EXISTS panels (
+                    id INTEGER PRIMARY KEY,
+                    address TEXT,
+                    username TEXT,
+                    password TEXT,
+                    fetched INTEGER,
+                    etag TEXT,
+                    last_modified TEXT,
+                    categories TEXT,
+                    UNIQUE (address, username, password)
+                );
+                CREATE TABLE IF NOT EXISTS panel_streams (
+                    panel INTEGER,
+                    category_id TEXT,
+                    streams TEXT,
+                    PRIMARY KEY (panel, category_id)
+                );
+            """)
+            self.con = con
+        return self.con
+
+    @staticmethod
+    def ttl():
+        try:
+            minutes = float(xbmcaddon.Addon().getSetting("xtream_panel_ttl") or 60)
+        except ValueError:
+            minutes = 60
+        return minutes * 60
+
+    def _panel(self, server):
+        return self.connect().execute(
+            "SELECT id, fetched, etag, last_modified, categories FROM panels "
+            "WHERE address = ? AND username = ? AND password = ?",
+            server,
+        ).fetchone()
+
+    def _store(self, server, data, etag, last_modified):
+        categories = [
+            (kind, cat["category_name"], str(cat["category_id"]))
+            for kind, cats in (data.get("categories") or {}).items()
+            for cat in cats
+        ]
+        streams = {}
+        for stream_id, channel in (data.get("available_channels") or {}).items():
+            streams.setdefault(str(channel.get("category_id")), []).append(
+                (stream_id, channel.get("name"), channel.get("stream_icon"))
+            )
+        con = self.connect()
+        with con:
+            con.execute(
+                """INSERT OR REPLACE INTO panels
+                   (id, address, username, password, fetched, etag, last_modified, categories)
+                   VALUES((SELECT id FROM panels WHERE address = ? AND username = ? AND password = ?),
+                          ?, ?, ?, ?, ?, ?, ?)""",
+                server + server + (int(time.time()), etag, last_modified, json.dumps(categories)),
+            )
+            panel_id = self._panel(server)[0]
+            con.execute("DELETE FROM panel_streams WHERE panel = ?", (panel_id,))
+            con.executemany(
+                "INSERT INTO panel_streams(panel, category_id, streams) VALUES(?, ?, ?)",
+                ((panel_id, cat_id, json.dumps(entries)) for cat_id, entries in streams.items()),
+            )
+        return panel_id
+
+    def refresh(self, address, username, password):
+        """
+        Make sure the snapshot of a server is no older than the TTL and
+        return its panel id. A stale snapshot is still used if the server
+        cannot be reached.
+        """
+        server = (address, username, password)
+        with self.lock:
+            row = self._panel(server)
+            if row and time.time() - row[1] < self.ttl():
+                return row[0]
+            headers = {}
+            if row:
+                if row[2]:
+                    headers["If-None-Match"] = row[2]
+                if row[3]:
+                    headers["If-Modified-Since"] = row[3]
+            try:
+                r = requests.get(
+                    address + f"/panel_api.php?username={username}&password={password}",
+                    headers=headers,
+                    timeout=self.timeout,
+                )
+                if r.status_code == 304 and row:
+                    with self.connect() as con:
+                        con.execute("UPDATE panels SET fetched = ? WHERE id = ?", (int(time.time()), row[0]))
+                    return row[0]
+                r.raise_for_status()
+                data = r.json()
+            except Exception as e:
+                if row:
+                    xbmc.log(f"[panel_snapshot] Refresh of {address} failed, using snapshot: {e}", xbmc.LOGWARNING)
+                    return row[0]
+                raise
+            return self._store(server, data, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+
+    def categories(self, address, username, password):
+        """(kind, category_name, category_id) for every category of the panel."""
+        self.refresh(address, username, password)
+        with self.lock:
+            row = self._panel((address, username, password))
+        return json.loads(row[4]) if row else []
+
+    def streams(self, address, username, password, category_id):
+        """(stream_id, name, stream_icon) for every stream in ``category_id``."""
+        panel_id = self.refresh(address, username, password)
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT streams FROM panel_streams WHERE panel = ? AND category_id = ?",
+                (panel_id, str(category_id)),
+            ).fetchone()
+        return json.loads(row[0]) if row else []
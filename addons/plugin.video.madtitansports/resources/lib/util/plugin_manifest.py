@@ -0,0 +1,190 @@
+"""
+Manifest of the modules in the plugins package.
+
+Building it imports every plugin module once and records, per module, the
+Plugin subclasses it registered: their name, priority, the hooks they
+override and the static prefixes of the routes they declare. It is stored in
+the addon profile and rebuilt only when the addon version or the plugin
+files (name, mtime, size) change. Later invocations import a plugin module
+only once one of its hooks is run or one of its routes matches the
+requested path.
+"""
+import importlib
+import json
+import os
+
+import xbmc
+import xbmcaddon
+from xbmcvfs import translatePath
+
+MANIFEST_VERSION = 1
+
+
+def _list_modules(path):
+    try:
+        files = os.listdir(path)
+    except OSError:
+        return []
+    return sorted(f[:-3] for f in files if not f.startswith("__") and f.endswith(".py"))
+
+
+def _signature(path):
+    sig = []
+    for name in _list_modules(path):
+        try:
+            st = os.stat(os.path.join(path, name + ".py"))
+            sig.append([name, int(st.st_mtime), st.st_size])
+        except OSError:
+            continue
+    return sig
+
+
+def _route_prefix(pattern):
+    """Static part of a route pattern, e.g. "/lntv/category" for "/lntv/category/<category>"."""
+    return pattern.split("<", 1)[0].rstrip("/") or "/"
+
+
+class _RouteRecorder:
+    """Stands in for routing.Plugin while building, collecting route patterns."""
+
+    def __init__(self):
+        self.patterns = []
+
+    def route(self, pattern):
+        self.patterns.append(pattern)
+        return lambda func: func
+
+    def add_route(self, func, pattern):
+        self.patterns.append(pattern)
+
+
+class PluginManifest:
+    """
+    Tracks which plugin module provides which hooks and routes.
+
+    ``base`` is the Plugin class and ``instances`` a callable returning the
+    currently registered plugin instances; both are only used while
+    (re)building.
+    """
+
+    def __init__(self, package, path, base, instances, hooks):
+        self.package = package
+        self.path = path
+        self.base = base
+        self.instances = instances
+        self.hooks = hooks
+        addon = xbmcaddon.Addon()
+        self.version = addon.getAddonInfo("version")
+        try:
+            self.manifest_file = os.path.join(translatePath(addon.getAddonInfo("profile")), "plugin_manifest.json")
+        except Exception:
+            self.manifest_file = ""
+        self.modules = None
+        self.loaded = set()
+        self.loaded_hooks = set()
+        self.fully_loaded = False
+
+    def _read(self):
+        if not self.manifest_file or not os.path.exists(self.manifest_file):
+            return None
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            xbmc.log(f"[plugin_manifest] Failed to read manifest: {e}", xbmc.LOGWARNING)
+            return None
+        if data.get("manifest_version") != MANIFEST_VERSION or data.get("version") != self.version:
+            return None
+        if data.get("signature") != _signature(self.path):
+            return None
+        return data.get("modules")
+
+    def _write(self):
+        if not self.manifest_file:
+            return
+        data = {
+            "manifest_version": MANIFEST_VERSION,
+            "version": self.version,
+            "signature": _signature(self.path),
+            "modules": self.modules,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+            tmp_file = self.manifest_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.manifest_file)
+        except Exception as e:
+            xbmc.log(f"[plugin_manifest] Failed to write manifest: {e}", xbmc.LOGWARNING)
+
+    def _import(self, name):
+        if name in self.loaded:
+            return
+        self.loaded.add(name)
+        try:
+            importlib.import_module(f"{self.package}.{name}")
+        except Exception as e:
+            xbmc.log(f"[plugin_manifest] Failed to load plugin {name}: {e}", xbmc.LOGERROR)
+
+    def _build(self):
+        self.load_all()
+        modules = {name: {"plugins": [], "routes": []} for name in _list_modules(self.path)}
+        for plugin in self.instances():
+            klass = type(plugin)
+            module = klass.__module__.rsplit(".", 1)[-1]
+            if not klass.__module__.startswith(self.package + ".") or module not in modules:
+                continue
+            entry = modules[module]
+            hooks = [
+                hook for hook in self.hooks
+                if getattr(klass, hook, None) is not getattr(self.base, hook, None)
+            ]
+            entry["plugins"].append({"name": plugin.name, "priority": plugin.priority, "hooks": hooks})
+            if hasattr(plugin, "routes"):
+                recorder = _RouteRecorder()
+                try:
+                    plugin.routes(recorder)
+                except Exception as e:
+                    xbmc.log(f"[plugin_manifest] Could not list routes of {plugin.name}: {e}", xbmc.LOGWARNING)
+                    recorder.patterns.append("/")
+                for prefix in map(_route_prefix, recorder.patterns):
+                    if prefix not in entry["routes"]:
+                        entry["routes"].append(prefix)
+        return modules
+
+    def ensure(self):
+        """Load the manifest, rebuilding it (and so importing everything) if stale."""
+        if self.modules is not None:
+            return
+        self.modules = self._read()
+        if self.modules is None:
+            self.modules = self._build()
+            self._write()
+
+    def load_all(self):
+        if self.fully_loaded:
+            return
+        for name in _list_modules(self.path):
+            self._import(name)
+        self.fully_loaded = True
+
+    def load_hook(self, hook):
+        """Import the modules with a plugin overriding ``hook``."""
+        if self.fully_loaded or hook in self.loaded_hooks:
+            return
+        if hook not in self.hooks:
+            self.load_all()
+            return
+        self.loaded_hooks.add(hook)
+        self.ensure()
+        for name, entry in self.modules.items():
+            if any(hook in plugin["hooks"] for plugin in entry["plugins"]):
+                self._import(name)
+
+    def load_routes(self, path):
+        """Import the modules declaring a route that may match ``path``."""
+        self.ensure()
+        path = path or "/"
+        for name, entry in self.modules.items():
+            if any(path.startswith(prefix) for prefix in entry["routes"]):
+                self._import(name)
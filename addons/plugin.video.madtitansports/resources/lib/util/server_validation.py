@@ -0,0 +1,98 @@
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import xbmc
+
+
+class HostLimiter:
+    """Caps how many requests may run against the same host at once."""
+
+    def __init__(self, per_host=2):
+        self.per_host = max(1, int(per_host or 1))
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def __call__(self, address):
+        host = urlparse(address).netloc.lower() or address
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+        return sem
+
+
+def validate_servers(servers, validate, commit, workers=8, per_host=2, progress=None, is_canceled=None):
+    """
+    Run validate(server) for every (address, username, password) tuple on a
+    bounded thread pool and hand each result to commit(server, result).
+
+    commit is always called from one dedicated writer thread, in completion
+    order, so database writes never run concurrently. progress(done, total)
+    and is_canceled() are called from the calling thread, which is the one
+    allowed to touch Kodi dialogs. Servers that have not started when
+    is_canceled() returns True are skipped; running ones are allowed to
+    finish and are still committed.
+
+    Returns the number of servers that were validated.
+    """
+    servers = list(servers)
+    total = len(servers)
+    if not total:
+        return 0
+
+    limiter = HostLimiter(per_host)
+    cancel = threading.Event()
+    results = queue.Queue()
+
+    def writer():
+        while True:
+            entry = results.get()
+            if entry is None:
+                break
+            server, result = entry
+            try:
+                commit(server, result)
+            except Exception as e:
+                xbmc.log(f"[server_validation] Commit failed for {server[0]}: {e}", xbmc.LOGERROR)
+
+    def task(server):
+        if cancel.is_set():
+            return False
+        with limiter(server[0]):
+            if cancel.is_set():
+                return False
+            try:
+                result = validate(server)
+            except Exception as e:
+                xbmc.log(f"[server_validation] Validation error {server[0]}: {e}", xbmc.LOGERROR)
+                result = None
+        results.put((server, result))
+        return True
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.daemon = True
+    writer_thread.start()
+
+    done = 0
+    workers = max(1, min(int(workers or 1), total))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = set(executor.submit(task, server) for server in servers)
+        while pending:
+            finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if not future.cancelled() and future.result():
+                    done += 1
+            if progress:
+                progress(done, total)
+            if not cancel.is_set() and is_canceled and is_canceled():
+                cancel.set()
+                for future in pending:
+                    future.cancel()
+    finally:
+        executor.shutdown(wait=True)
+        results.put(None)
+        writer_thread.join()
+    return done
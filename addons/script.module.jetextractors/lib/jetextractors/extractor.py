@@ -1,71 +1,167 @@
-from typing import Callable, Optional
+import time
+from typing import Callable, Iterator, Optional
 from .models import *
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+# How often iter_search_extractors checks its cancelled() callback
+CANCEL_POLL_INTERVAL = 0.25
+
+
+class ExtractorRegistry:
+    """
+    The extractor instances of this process, created once, with lookups by
+    name and by URL host.
+
+    JetExtractor.is_available() matches a plain domain when the URL host is
+    a substring of it, so every substring of every plain domain is indexed,
+    pointing at the first extractor (in registration order) that declares
+    it. Extractors with regex domains or their own is_available() can't be
+    indexed and are scanned, in order, only when they come before the
+    indexed match.
+    """
+
+    def __init__(self, extractors: List[JetExtractor]) -> None:
+        self.extractors = extractors
+        self.by_name: Dict[str, JetExtractor] = {}
+        self.by_host: Dict[str, int] = {}
+        self.domains = set()
+        self.unindexed: List[Tuple[int, JetExtractor]] = []
+        for i, ext in enumerate(extractors):
+            self.by_name.setdefault(ext.name, ext)
+            self.domains.update(ext.domains)
+            if ext.domains_regex or type(ext).is_available is not JetExtractor.is_available:
+                self.unindexed.append((i, ext))
+                continue
+            for domain in ext.domains:
+                for start in range(len(domain) + 1):
+                    for end in range(start, len(domain) + 1):
+                        self.by_host.setdefault(domain[start:end], i)
+
+
+    def find(self, url: JetLink) -> Optional[JetExtractor]:
+        match = self.by_host.get(urlparse(url.address).netloc)
+        for i, ext in self.unindexed:
+            if match is not None and i > match:
+                break
+            if ext.is_available(url):
+                return ext
+        return None if match is None else self.extractors[match]
+
+
+_registry: Optional[ExtractorRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ExtractorRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from . import extractors
+                from .config import get_config
+                conf = get_config()
+
+                extractor_list = []
+                for extractor in JetExtractor.subclasses:
+                    ext = extractor()
+                    if extractor.__name__ in conf.get("domains", {}):
+                        ext.domains = conf["domains"][extractor.__name__]
+                    extractor_list.append(ext)
+                _registry = ExtractorRegistry(extractor_list)
+    return _registry
+
 
 def get_extractors() -> List[JetExtractor]:
-    from . import extractors
-    from .config import get_config
-    classes = JetExtractor.subclasses
-    extractor_list = []
-    conf = get_config()
-    
-    for extractor in classes:
-        ext = extractor()
-        if extractor.__name__ in conf.get("domains", {}):
-            ext.domains = conf["domains"][extractor.__name__]
-        extractor_list.append(ext)
-    return extractor_list
+    return get_registry().extractors
 
 
 def get_extractor(name: str) -> Optional[JetExtractor]:
-    for extractor in get_extractors():
-        if extractor.name == name:
-            return extractor
-    return None
+    return get_registry().by_name.get(name)
 
 
 def find_extractor(url: JetLink) -> Optional[JetExtractor]:
-    for e in get_extractors():
-        if e.is_available(url):
-            return e
-    return None
+    return get_registry().find(url)
 
 
-def search_extractors(query: str, exclude: Optional[List[str]] = None, include: Optional[List[str]] = None, progress: Callable[[JetExtractorSearchProgress], None] = None) -> List[JetLink]:
+def iter_search_extractors(
+    query: str,
+    exclude: Optional[List[str]] = None,
+    include: Optional[List[str]] = None,
+    progress: Callable[[JetExtractorSearchProgress], None] = None,
+    deadline: Optional[float] = None,
+    cancelled: Optional[Callable[[], bool]] = None
+) -> Iterator[Tuple[str, List[JetItem]]]:
+    """
+    Search the extractors concurrently and yield (extractor name, items) as
+    each one finishes. Once ``deadline`` seconds have passed, ``cancelled()``
+    returns true (it is polled every CANCEL_POLL_INTERVAL seconds) or the
+    generator is closed early, the remaining extractors are told to stop
+    through their progress event and are no longer waited for.
+    """
     query = query.lower()
-    res: list[JetItem] = []
-    extractors = filter(
-        lambda e: not (
+    extractors = [
+        e for e in get_extractors()
+        if not (
             e.disabled or
             e.resolve_only or
             (exclude is not None and e.name in exclude) or
             (include is not None and len(include) > 0 and e.name not in include)
-        ),
-        get_extractors()
-    )
-    
+        )
+    ]
+
     prog = JetExtractorSearchProgress()
-    with ThreadPoolExecutor() as executor:
-        threads: List[Tuple[str, object]] = []
-        for e in extractors:
-            eprog = JetExtractorProgress(event=prog.event)
-            prog.extractors[e.name] = eprog
-            threads.append((e.name, executor.submit(e.get_items, progress=eprog)))
-        prog.total = len(threads)
-
-        for name, thread in threads:
-            try:
-                items = list(filter(lambda x: query in x.title.lower() or query in (x.league.lower() if x.league is not None else ""), thread.result()))
-                for item in items:
-                    item.extractor = name
-            except:
-                items = []
-            res.extend(items)
-            prog.links += len(items)
-            del prog.extractors[name]
-            if progress is not None:
-                progress(prog)
+    prog.total = len(extractors)
+    executor = ThreadPoolExecutor()
+    futures: Dict[Future, str] = {}
+    for e in extractors:
+        eprog = JetExtractorProgress(event=prog.event)
+        prog.extractors[e.name] = eprog
+        futures[executor.submit(e.search, query, progress=eprog)] = e.name
+
+    end = None if deadline is None else time.time() + deadline
+    pending = set(futures)
+    try:
+        while pending:
+            if cancelled is not None and cancelled():
+                break
+            timeout = CANCEL_POLL_INTERVAL if cancelled is not None else None
+            if end is not None:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    break
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    items = future.result()
+                    for item in items:
+                        item.extractor = name
+                except:
+                    items = []
+                prog.links += len(items)
+                del prog.extractors[name]
+                if progress is not None:
+                    progress(prog)
+                yield name, items
+    finally:
+        prog.event.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
 
+def search_extractors(
+    query: str,
+    exclude: Optional[List[str]] = None,
+    include: Optional[List[str]] = None,
+    progress: Callable[[JetExtractorSearchProgress], None] = None,
+    deadline: Optional[float] = None,
+    cancelled: Optional[Callable[[], bool]] = None
+) -> List[JetItem]:
+    res: List[JetItem] = []
+    for _, items in iter_search_extractors(query, exclude, include, progress, deadline, cancelled):
+        res.extend(items)
     return res
 
 
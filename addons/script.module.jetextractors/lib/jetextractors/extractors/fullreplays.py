@@ -1,6 +1,7 @@
 # Whoever wrote this: do NOT call xbmc or resolveurl functions in Jetextractors
 from bs4 import BeautifulSoup as bs
 from requests.sessions import Session
+from urllib.parse import quote_plus
 from ..models import *
 
 class FullReplays(JetExtractor):
@@ -49,6 +50,11 @@ class FullReplays(JetExtractor):
         return items
     
     
+    def search(self, query: str, progress: Optional[JetExtractorProgress] = None) -> List[JetItem]:
+        items = self.get_items({"page": f"{self.base_url}/?s={quote_plus(query)}"}, progress)
+        return [item for item in items if item.params is None]
+
+
     def get_links(self, url: JetLink) -> List[JetLink]:
         links = []
         response = self.session.get(url.address).text
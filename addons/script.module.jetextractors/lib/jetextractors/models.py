@@ -448,6 +448,18 @@ class JetExtractor:
         return []
     
 
+    def search(self, query: str, progress: Optional[JetExtractorProgress] = None) -> List[JetItem]:
+        """
+        Items matching ``query`` (lowercase). The default lists everything
+        with get_items() and keeps items whose title or league contains the
+        query; extractors whose site can search override this.
+        """
+        return [
+            item for item in self.get_items(progress=progress)
+            if query in item.title.lower() or query in (item.league.lower() if item.league is not None else "")
+        ]
+
+
     def get_link(self, url: JetLink) -> JetLink:
         return None
     
@@ -0,0 +1,77 @@
+"""
+Ad/tracker host blocklist built from the StevenBlack hosts file.
+
+The hosts file is parsed once into a set of hostnames and cached in the
+addon profile, one host per line, until it is older than REFRESH_INTERVAL.
+A host is blocked when it or one of its parent domains is listed.
+"""
+import os, threading, time
+import requests, xbmcaddon
+from xbmcvfs import translatePath
+
+HOSTS_URL = "https://raw.githubusercontent.com/StevenBlack/hosts/master/hosts"
+REFRESH_INTERVAL = 7 * 24 * 60 * 60
+IGNORED = {"localhost", "localhost.localdomain", "local", "broadcasthost", "0.0.0.0"}
+
+_hosts = None
+_lock = threading.Lock()
+
+
+def parse_hosts(text: str) -> set:
+    hosts = set()
+    for line in text.splitlines():
+        fields = line.split("#", 1)[0].split()
+        if len(fields) >= 2 and fields[0] in ("0.0.0.0", "127.0.0.1"):
+            hosts.update(host.lower() for host in fields[1:])
+    return hosts - IGNORED
+
+
+def _cache_file() -> str:
+    return os.path.join(translatePath(xbmcaddon.Addon().getAddonInfo("profile")), "ad_hosts.txt")
+
+
+def _load() -> set:
+    path = _cache_file()
+    try:
+        fresh = time.time() - os.path.getmtime(path) < REFRESH_INTERVAL
+    except OSError:
+        fresh = False
+
+    if not fresh:
+        try:
+            r = requests.get(HOSTS_URL, timeout=10)
+            r.raise_for_status()
+            hosts = parse_hosts(r.text)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write("\n".join(sorted(hosts)))
+            os.replace(path + ".tmp", path)
+            return hosts
+        except Exception:
+            pass
+
+    # Fresh cache, or a stale one when the download failed
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return set(f.read().split())
+    except OSError:
+        return set()
+
+
+def get_hosts() -> set:
+    global _hosts
+    if _hosts is None:
+        with _lock:
+            if _hosts is None:
+                _hosts = _load()
+    return _hosts
+
+
+def is_ad_host(host: str) -> bool:
+    """``host`` may be a netloc (user info and port are ignored)."""
+    host = host.rsplit("@", 1)[-1].split(":", 1)[0].rstrip(".").lower()
+    if not host:
+        return False
+    hosts = get_hosts()
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in hosts for i in range(max(len(parts) - 1, 1)))
@@ -1,54 +1,121 @@
-import requests, re
+import requests, re, time, xbmc
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 from ..util import m3u8_src
+from ..util.ad_hosts import is_ad_host
 from urllib.parse import urlparse
 user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.93 Safari/537.36"
 
-ad_hosts = ""
-def find_iframes(url, prev_url = "", links = [], checked = []):
+# Per-crawl budgets
+MAX_LINKS = 15
+MAX_DEPTH = 4
+MAX_REQUESTS = 40
+TIME_BUDGET = 20
+WORKERS = 6
+
+def find_iframes(url, prev_url = "", links = None, checked = None, headers = None):
+    """
+    Crawl ``url`` and the frames it embeds breadth-first, a level at a time
+    with a small worker pool, and return the links to known extractor
+    domains and m3u8 streams found on the way. As soon as a page yields a
+    stream through m3u8_src the crawl stops and that link comes first.
+
+    Every URL is fetched at most once per crawl, and the crawl ends after
+    MAX_DEPTH levels, MAX_REQUESTS fetches or TIME_BUDGET seconds. ``links``
+    and ``checked`` only seed the result and the visited set.
+    """
     from .. import extractor
-    extractors = extractor.get_extractors()
+    known_domains = extractor.get_registry().domains
+    links = list(links or [])
+    visited = set(checked or [])
+    visited.add(url)
+    frontier = [(url, prev_url)]
+    requests_left = MAX_REQUESTS
+    deadline = time.time() + TIME_BUDGET
+
+    executor = ThreadPoolExecutor(WORKERS)
+    futures = {}
     try:
-        links = links
-        checked = checked
-        r = requests.get(url, allow_redirects=True, timeout=7, headers={"Referer": prev_url, "User-Agent": user_agent})
-        if r.status_code == 200:
-            urls = re.findall('i?frame.+?src=[\"\']?([^\"\' ]+)', r.text, flags=re.IGNORECASE)
-            urls = __customUrls(r.text, url, urls)
-            scan = m3u8_src.scan_page(url, html=r.text)
+        for _ in range(MAX_DEPTH + 1):
+            batch = frontier[:requests_left]
+            requests_left -= len(batch)
+            if not batch:
+                break
+            futures = {executor.submit(__fetch, page, referer, headers): i for i, (page, referer) in enumerate(batch)}
+            pages = {}
             try:
-                scan = m3u8_src.scan_page(url, html=r.text)
-                if scan: return [scan]
-            except:
-                pass
-            for u in urls:
-                if urlparse(u).netloc == '':
-                    if u.startswith('/'): u = 'http://' + urlparse(url).netloc + '/' + u
-                    else: u = 'http://' + urlparse(url).netloc + '/'.join(urlparse(url).path.split('/')[:-1]) +  '/' + u
-                if urlparse(u).scheme == '': u = 'http://' + u.replace('//','')
-
-                u = re.sub(r'\n+', '', u)
-                u = re.sub(r'\r+', '', u)
-                
-                domain = urlparse(u).netloc
-                if not isAd(u) and u not in checked and __checkUrl(u) and u not in links and len(links)<15:
+                for future in as_completed(futures, timeout=max(deadline - time.time(), 0)):
+                    html = future.result()
+                    if html is None:
+                        continue
+                    page = batch[futures[future]][0]
+                    try:
+                        scan = m3u8_src.scan_page(page, html=html)
+                        if scan:
+                            return __unique([scan] + links)
+                    except:
+                        pass
+                    pages[futures[future]] = html
+            except FuturesTimeoutError:
+                break
+
+            # Links are taken in page order, like a depth-first walk would see them
+            frontier = []
+            for i in sorted(pages):
+                page = batch[i][0]
+                try:
+                    urls = __customUrls(pages[i], page, re.findall('i?frame.+?src=[\"\']?([^\"\' ]+)', pages[i], flags=re.IGNORECASE))
+                except Exception as e:
+                    xbmc.log(f"[find_iframes] Skipping {page}: {e}", xbmc.LOGWARNING)
+                    continue
+                for u in urls:
+                    if len(links) >= MAX_LINKS:
+                        break
+                    try:
+                        u = __absoluteUrl(u, page)
+                        domain = urlparse(u).netloc
+                    except ValueError:
+                        continue
+                    if u in visited or u in links or isAd(u) or not __checkUrl(u):
+                        continue
+                    visited.add(u)
                     if u.startswith("https://href.li/?"): u = u.replace("https://href.li/?", "")
-                    for module in extractors:
-                        if domain in module.domains or ".m3u8" in u:
-                            if ".m3u8" in u or "wigistream" in u: u += "|Referer=%s&User-Agent=%s" % (url.replace("&", "_"), user_agent)
-                            links.append(u)
-                    links += find_iframes(u, url, links, checked)
-                    checked.append(u)
-            return list(set(links))
-        return []
-    except Exception as e:
-        return []
+                    if domain in known_domains or ".m3u8" in u:
+                        if ".m3u8" in u or "wigistream" in u: u += "|Referer=%s&User-Agent=%s" % (page.replace("&", "_"), user_agent)
+                        links.append(u)
+                    if ".m3u8" not in u:
+                        frontier.append((u, page))
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+    return __unique(links)
+
+def __fetch(url, referer, headers=None):
+    h = {"Referer": referer, "User-Agent": user_agent}
+    if headers:
+        h.update(headers)
+    try:
+        r = requests.get(url, allow_redirects=True, timeout=7, headers=h)
+        return r.text if r.status_code == 200 else None
+    except Exception:
+        return None
+
+def __absoluteUrl(u, url):
+    if urlparse(u).netloc == '':
+        if u.startswith('/'): u = 'http://' + urlparse(url).netloc + '/' + u
+        else: u = 'http://' + urlparse(url).netloc + '/'.join(urlparse(url).path.split('/')[:-1]) +  '/' + u
+    if urlparse(u).scheme == '': u = 'http://' + u.replace('//','')
+
+    u = re.sub(r'\n+', '', u)
+    u = re.sub(r'\r+', '', u)
+    return u
+
+def __unique(links):
+    seen = set()
+    return [l for l in links if not (l in seen or seen.add(l))]
 
 def isAd(host):
-    global ad_hosts
-    if ad_hosts == "":
-        ad_hosts = requests.get('https://raw.githubusercontent.com/StevenBlack/hosts/master/hosts').text
-    h = urlparse(host).netloc
-    return (h in ad_hosts) or "/ad" in host
+    return is_ad_host(urlparse(host).netloc) or "/ad" in host
 
 def __checkUrl(url):
 		blacklist = ['chatango', 'adserv', 'live_chat', 'ad4', 'cloudfront', 'image/svg', 'getbanner.php','/ads', 'ads.', 'adskeeper', '.js', '.jpg', '.png', '/adself.', 'min.js', 'mail.ru', "/http", "googleusercontent"]
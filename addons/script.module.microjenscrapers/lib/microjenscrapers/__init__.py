@@ -7,8 +7,12 @@
 # valuable contributions in bringing this project together 
 # and for ongoing  maintenance / development                        
 #########################################
+import ast
+import importlib.util
+import json
 import pkgutil
 import os
+import sys
 
 try:
     from .modules import cfscrape
@@ -25,31 +29,130 @@ except:
     pass
 
 
-def sources():
+CONTENT_TYPES = ('movie', 'tvshow')
+MANIFEST_VERSION = 1
+_manifest = None
+
+
+def sources(content=None):
+    """
+    (module_name, source instance) for every enabled provider of the chosen
+    package folder. With ``content`` ('movie' or 'tvshow') only providers
+    implementing it are imported and returned.
+    """
     try:
         sourceDict = []
-        if __addon__ is not None:
-            provider = __addon__.getSetting('package.folder')
-        else:
-            provider = 'microjenscrapers'
-        sourceFolder = getScraperFolder(provider)
-        sourceFolderLocation = os.path.join(os.path.dirname(__file__), sourceFolder)
-        sourceSubFolders = [x[1] for x in os.walk(sourceFolderLocation)][0]
-        for i in sourceSubFolders:
-            for loader, module_name, is_pkg in pkgutil.walk_packages([os.path.join(sourceFolderLocation, i)]):
-                if is_pkg:
-                    continue
-                if enabledCheck(module_name):
-                    try:
-                        module = loader.find_module(module_name).load_module(module_name)
-                        sourceDict.append((module_name, module.source()))
-                    except:
-                        pass
+        for entry in providerManifest():
+            if content is not None and content not in entry['content']:
+                continue
+            if not enabledCheck(entry['name']):
+                continue
+            try:
+                module = _loadProvider(entry)
+                sourceDict.append((entry['name'], module.source()))
+            except:
+                pass
         return sourceDict
     except:
         return []
 
 
+def providerManifest():
+    """
+    The providers of the chosen package folder: module name, path relative
+    to this package and the content types its source class implements.
+
+    Found by parsing (not importing) the provider files, skipping the OLD-*
+    copies, and cached in the addon profile until the addon version or the
+    package folder changes.
+    """
+    global _manifest
+    provider = __addon__.getSetting('package.folder') if __addon__ is not None else 'microjenscrapers'
+    version = __addon__.getAddonInfo('version') if __addon__ is not None else ''
+    key = [MANIFEST_VERSION, version, provider]
+    if _manifest is not None and _manifest['key'] == key:
+        return _manifest['providers']
+
+    manifestFile = _manifestFile()
+    if manifestFile and os.path.exists(manifestFile):
+        try:
+            with open(manifestFile, 'r') as f:
+                data = json.load(f)
+            if data.get('key') == key:
+                _manifest = data
+                return _manifest['providers']
+        except:
+            pass
+
+    _manifest = {'key': key, 'providers': _scanProviders(getScraperFolder(provider))}
+    if manifestFile:
+        try:
+            if not os.path.exists(os.path.dirname(manifestFile)):
+                os.makedirs(os.path.dirname(manifestFile))
+            with open(manifestFile + '.tmp', 'w') as f:
+                json.dump(_manifest, f)
+            os.replace(manifestFile + '.tmp', manifestFile)
+        except:
+            pass
+    return _manifest['providers']
+
+
+def _manifestFile():
+    if __addon__ is None:
+        return None
+    try:
+        from kodi_six import xbmcvfs
+        return os.path.join(xbmcvfs.translatePath(__addon__.getAddonInfo('profile')), 'providers.json')
+    except:
+        return None
+
+
+def _scanProviders(sourceFolder):
+    providers = []
+    packageLocation = os.path.dirname(__file__)
+    sourceFolderLocation = os.path.join(packageLocation, sourceFolder)
+    sourceSubFolders = [x[1] for x in os.walk(sourceFolderLocation)][0]
+    for i in sorted(sourceSubFolders):
+        for loader, module_name, is_pkg in pkgutil.walk_packages([os.path.join(sourceFolderLocation, i)]):
+            if is_pkg or module_name.startswith('OLD-'):
+                continue
+            path = os.path.join(sourceFolderLocation, i, module_name + '.py')
+            try:
+                with open(path, 'rb') as f:
+                    tree = ast.parse(f.read())
+            except:
+                continue
+            methods = set()
+            for node in tree.body:
+                if isinstance(node, ast.ClassDef) and node.name == 'source':
+                    methods.update(n.name for n in node.body if isinstance(n, ast.FunctionDef))
+            if not methods:
+                continue
+            providers.append({
+                'name': module_name,
+                'path': os.path.relpath(path, packageLocation),
+                'content': [c for c in CONTENT_TYPES if c in methods],
+            })
+    return providers
+
+
+def _loadProvider(entry):
+    """Import a provider file under its bare module name, once per process."""
+    module = sys.modules.get(entry['name'])
+    path = os.path.join(os.path.dirname(__file__), entry['path'])
+    if module is not None and getattr(module, '__file__', None) == path:
+        return module
+    spec = importlib.util.spec_from_file_location(entry['name'], path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[entry['name']] = module
+    try:
+        spec.loader.exec_module(module)
+    except:
+        del sys.modules[entry['name']]
+        raise
+    return module
+
+
 def enabledCheck(module_name):
     if __addon__ is not None:
         if __addon__.getSetting('provider.' + module_name) == 'true':
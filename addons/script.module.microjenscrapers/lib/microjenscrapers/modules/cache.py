@@ -18,11 +18,13 @@
 
 from __future__ import absolute_import
 
+import atexit
 import hashlib
+import json
 import re
+import threading
 import time
 import os
-from ast import literal_eval as evaluate
 import six
 
 try:
@@ -41,6 +43,16 @@ elif six.PY3:
 cache_table = 'cache'
 data_path = control.transPath(control.addon("script.module.microjenscrapers").getAddonInfo('profile'))
 
+# Rows stay this long past their duration, as get() falls back to them when
+# the wrapped function comes back empty; the sweep runs at most this often.
+EXPIRY_GRACE = 7 * 24 * 60 * 60
+SWEEP_INTERVAL = 6 * 60 * 60
+
+_conn = None
+_tables = set()
+_lock = threading.RLock()
+
+
 def get(function_, duration, *args, **table):
 
     try:
@@ -62,20 +74,9 @@ def get(function_, duration, *args, **table):
         table = 'rel_list'
 
     try:
-        control.makeFile(control.dataPath)
-        dbcon = db.connect(control.cacheFile)
-        dbcur = dbcon.cursor()
-        dbcur.execute("SELECT * FROM {tn} WHERE func = '{f}' AND args = '{a}'".format(tn=table, f=f, a=a))
-        match = dbcur.fetchone()
-
-        try:
-            response = evaluate(match[2].encode('utf-8'))
-        except AttributeError:
-            response = evaluate(match[2])
-
-        t1 = int(match[3])
-        t2 = int(time.time())
-        update = (abs(t2 - t1) / 3600) >= int(duration)
+        match = _fetch(table, f, a)
+        response = json.loads(match[0])
+        update = (abs(int(time.time()) - int(match[1])) / 3600) >= int(duration)
         if not update:
             return response
     except Exception:
@@ -91,68 +92,61 @@ def get(function_, duration, *args, **table):
         return
 
     try:
-        r = repr(r)
-        t = int(time.time())
-        dbcur.execute("CREATE TABLE IF NOT EXISTS {} (""func TEXT, ""args TEXT, ""response TEXT, ""added TEXT, ""UNIQUE(func, args)"");".format(table))
-        dbcur.execute("DELETE FROM {0} WHERE func = '{1}' AND args = '{2}'".format(table, f, a))
-        dbcur.execute("INSERT INTO {} Values (?, ?, ?, ?)".format(table), (f, a, r, t))
-        dbcon.commit()
+        _store(table, f, a, json.dumps(r), int(float(duration) * 3600))
     except Exception:
         pass
 
-    try:
-        return evaluate(r.encode('utf-8'))
-    except Exception:
-        return evaluate(r)
+    return r
 
-def timeout(function_, *args):
+def timeout(function_, *args, **table):
     try:
-        key = _hash_function(function_, args)
-        result = cache_get(key)
-        return int(result['date'])
+        a = hashlib.md5()
+        for i in args:
+            a.update(six.ensure_binary(i, errors='replace'))
+        match = _fetch(table.get('table', 'rel_list'), _get_function_name(function_), str(a.hexdigest()))
+        return int(match[1])
     except Exception:
         return None
 
 def cache_get(key):
     # type: (str, str) -> dict or None
     try:
-        cursor = _get_connection_cursor()
-        cursor.execute("SELECT * FROM %s WHERE key = ?" % cache_table, [key])
-        return cursor.fetchone()
+        with _lock:
+            _ensure_table(cache_table)
+            row = _connect().execute(
+                'SELECT key, value, added FROM "%s" WHERE key = ?' % cache_table, (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'key': row[0], 'value': row[1], 'date': row[2]}
     except OperationalError:
         return None
 
 def cache_insert(key, value):
     # type: (str, str) -> None
-    cursor = _get_connection_cursor()
-    now = int(time.time())
-    cursor.execute(
-        "CREATE TABLE IF NOT EXISTS %s (key TEXT, value TEXT, date INTEGER, UNIQUE(key))"
-        % cache_table
-    )
-    update_result = cursor.execute(
-        "UPDATE %s SET value=?,date=? WHERE key=?"
-        % cache_table, (value, now, key))
-
-    if update_result.rowcount is 0:
-        cursor.execute(
-            "INSERT INTO %s Values (?, ?, ?)"
-            % cache_table, (key, value, now)
-        )
-
-    cursor.connection.commit()
+    with _lock:
+        _ensure_table(cache_table)
+        conn = _connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO "%s" (key, value, added) VALUES (?, ?, ?)' % cache_table,
+                (key, value, int(time.time()))
+            )
 
 def cache_clear():
     try:
-        cursor = _get_connection_cursor()
-
-        for t in [cache_table, 'rel_list', 'rel_lib']:
-            try:
-                cursor.execute("DROP TABLE IF EXISTS %s" % t)
-                cursor.execute("VACUUM")
-                cursor.commit()
-            except:
-                pass
+        with _lock:
+            conn = _connect()
+            # cache_meta is only created when the connection is opened, so it is emptied instead of dropped
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'cache_meta' AND name NOT LIKE 'sqlite_%'"
+            )]
+            for t in tables:
+                conn.execute('DROP TABLE IF EXISTS "%s"' % t)
+            conn.execute("DELETE FROM cache_meta WHERE key LIKE 'sweep_%'")
+            conn.commit()
+            _tables.clear()
+            conn.execute("VACUUM")
     except:
         pass
 
@@ -203,15 +197,76 @@ def cache_clear_all():
     cache_clear_meta()
     cache_clear_providers()
 
-def _get_connection_cursor():
-    conn = _get_connection()
-    return conn.cursor()
-
-def _get_connection():
-    control.makeFile(data_path)
-    conn = db.connect(os.path.join(data_path, 'cache.db'))
-    conn.row_factory = _dict_factory
-    return conn
+def _connect():
+    """The process-wide connection to the cache database, opened on first use."""
+    global _conn
+    with _lock:
+        if _conn is None:
+            control.makeFile(control.dataPath)
+            _conn = db.connect(control.cacheFile, check_same_thread=False)
+            _conn.execute("PRAGMA journal_mode = WAL")
+            _conn.execute("PRAGMA synchronous = NORMAL")
+            _conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value INTEGER)")
+            _conn.commit()
+            atexit.register(_close)
+        return _conn
+
+def _close():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+            _tables.clear()
+
+def _ensure_table(table):
+    """Create ``table`` the first time this process uses it and sweep its expired rows."""
+    if table in _tables:
+        return
+    if not re.match(r'^\w+$', table):
+        raise ValueError('Invalid cache table name: %s' % table)
+    conn = _connect()
+    with conn:
+        if table == cache_table:
+            conn.execute('CREATE TABLE IF NOT EXISTS "%s" (key TEXT PRIMARY KEY, value TEXT, added INTEGER)' % table)
+        else:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS "%s" (func TEXT, args TEXT, response TEXT, added INTEGER, '
+                'expires INTEGER, PRIMARY KEY (func, args))' % table
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS "%s_expires" ON "%s" (expires)' % (table, table))
+    _tables.add(table)
+    if table != cache_table:
+        _sweep(table)
+
+def _sweep(table):
+    """Delete the rows of ``table`` that expired more than EXPIRY_GRACE ago, in one statement."""
+    conn = _connect()
+    now = int(time.time())
+    row = conn.execute("SELECT value FROM cache_meta WHERE key = ?", ('sweep_' + table,)).fetchone()
+    if row is not None and now - row[0] < SWEEP_INTERVAL:
+        return
+    with conn:
+        conn.execute('DELETE FROM "%s" WHERE expires < ?' % table, (now - EXPIRY_GRACE,))
+        conn.execute("INSERT OR REPLACE INTO cache_meta (key, value) VALUES (?, ?)", ('sweep_' + table, now))
+
+def _fetch(table, func, args):
+    with _lock:
+        _ensure_table(table)
+        return _connect().execute(
+            'SELECT response, added FROM "%s" WHERE func = ? AND args = ?' % table, (func, args)
+        ).fetchone()
+
+def _store(table, func, args, response, duration):
+    now = int(time.time())
+    with _lock:
+        _ensure_table(table)
+        conn = _connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO "%s" (func, args, response, added, expires) VALUES (?, ?, ?, ?, ?)' % table,
+                (func, args, response, now, now + duration)
+            )
 
 def _get_connection_cursor_meta():
     conn = _get_connection_meta()
@@ -138,7 +138,7 @@ searchFile = os.path.join(dataPath, 'search.1.db')
 
 libcacheFile = os.path.join(dataPath, 'library.1.db')
 
-cacheFile = os.path.join(dataPath, 'cache.db')
+cacheFile = os.path.join(dataPath, 'cache.2.db')
 
 key = "RgUkXp2s5v8x/A?D(G+KbPeShVmYq3t6"
 
@@ -26,22 +26,31 @@ For most cases you probably want to use :func:`resolveurl.resolve` or
 
 
 """
+import os
 import re
 from six.moves import urllib_parse
 import six
-import sys
 from kodi_six import xbmcvfs, xbmcgui
 from resolveurl import common
 from resolveurl.hmf import HostedMediaFile
 from resolveurl.resolver import ResolveUrl
+from resolveurl.lib.resolver_index import ResolverIndex
 from resolveurl.plugins.__resolve_generic__ import ResolveGeneric
-from resolveurl.plugins import *  # NOQA
+from resolveurl import plugins
 
 common.logger.log_debug('Initializing ResolveURL version: %s' % common.addon_version)
 MAX_SETTINGS = 70
 
 PLUGIN_DIRS = []
 host_cache = {}
+BUILTIN_PLUGINS = (os.path.dirname(plugins.__file__), plugins.__name__)
+
+
+def _resolver_classes():
+    return ResolveUrl.__class__.__subclasses__(ResolveUrl) + ResolveUrl.__class__.__subclasses__(ResolveGeneric)
+
+
+resolver_index = ResolverIndex(_resolver_classes, version=common.addon_version)
 
 
 def add_plugin_dirs(dirs):
@@ -52,25 +61,26 @@ def add_plugin_dirs(dirs):
         PLUGIN_DIRS += dirs
 
 
-def load_external_plugins():
-    for d in PLUGIN_DIRS:
-        common.logger.log_debug('Adding plugin path: %s' % d)
-        sys.path.insert(0, d)
-        for filename in xbmcvfs.listdir(d)[1]:
-            if not filename.startswith('__') and filename.endswith('.py'):
-                mod_name = filename[:-3]
-                imp = __import__(mod_name, globals(), locals())
-                sys.modules[mod_name] = imp
-                common.logger.log_debug('Loaded %s as %s from %s' % (imp, mod_name, filename))
+def _load_plugins(domain=None, include_external=False):
+    """
+    Import the plugin modules needed to answer a lookup for ``domain``
+    (every module if ``domain`` is None) using the persistent resolver index.
+    """
+    dirs = [BUILTIN_PLUGINS]
+    if include_external:
+        dirs += [(d, '') for d in PLUGIN_DIRS]
+    if domain is None:
+        resolver_index.load_all(dirs)
+    else:
+        resolver_index.load_domain(domain, dirs)
 
 
 def relevant_resolvers(domain=None, include_universal=None, include_popups=None, include_external=False, include_disabled=False, order_matters=False):
-    if include_external:
-        load_external_plugins()
-
     if isinstance(domain, six.string_types):
         domain = domain.lower()
 
+    _load_plugins(domain, include_external)
+
     if include_universal is None:
         include_universal = common.get_setting('allow_universal') == "true"
 
@@ -79,7 +89,7 @@ def relevant_resolvers(domain=None, include_universal=None, include_popups=None,
     if include_popups is False:
         common.logger.log_debug('Resolvers that require popups have been disabled')
 
-    classes = ResolveUrl.__class__.__subclasses__(ResolveUrl) + ResolveUrl.__class__.__subclasses__(ResolveGeneric)
+    classes = _resolver_classes()
     relevant = []
     for resolver in classes:
         if include_disabled or resolver._is_enabled():
@@ -304,6 +314,7 @@ def _update_settings_xml():
         '\t\t<setting default="true" id="allow_popups" label="%s" type="bool"/>' % (common.i18n('enable_popups')),
         '\t\t<setting default="true" id="auto_pick" label="%s" type="bool"/>' % (common.i18n('auto_pick')),
         '\t\t<setting default="true" id="use_cache" label="%s" type="bool"/>' % (common.i18n('use_function_cache')),
+        '\t\t<setting default="10" id="cache_max_size" label="%s" type="slider" range="1,1,100" option="int" enable="eq(-1,true)"/>' % (common.i18n('function_cache_size')),
         '\t\t<setting id="reset_cache" type="action" label="%s" action="RunPlugin(plugin://script.module.resolveurl/?mode=reset_cache)"/>' % (common.i18n('reset_function_cache')),
         '\t\t<setting id="personal_nid" label="Your NID" type="text" visible="false" default=""/>',
         '\t\t<setting id="last_ua_create" label="last_ua_create" type="number" visible="false" default="0"/>',
@@ -377,4 +388,7 @@ def _update_settings_xml():
         common.logger.log_debug('No Settings Update Needed')
 
 
-_update_settings_xml()
+# The settings only change when the set of plugins does, which is exactly when
+# the resolver index has to be rebuilt.
+if resolver_index.ensure(*BUILTIN_PLUGINS) or not xbmcvfs.exists(common.settings_file):
+    _update_settings_xml()
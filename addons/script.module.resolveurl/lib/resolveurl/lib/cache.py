@@ -21,7 +21,11 @@ import time
 import pickle
 import hashlib
 import os
+import re
 import shutil
+import sqlite3
+import threading
+from collections import OrderedDict
 import six
 from resolveurl.lib import kodi
 
@@ -35,10 +39,125 @@ except Exception as e:
     logger.log('Failed to create cache: %s: %s' % (cache_path, e), log_utils.LOGWARNING)
 
 cache_enabled = kodi.get_setting('use_cache') == 'true'
+try:
+    cache_max_size = int(kodi.get_setting('cache_max_size') or 10) * 1024 * 1024
+except ValueError:
+    cache_max_size = 10 * 1024 * 1024
+
+cache_file = os.path.join(cache_path, 'function_cache.db')
+HOT_CACHE_ITEMS = 64  # entries kept in memory for the current invocation
+TOUCH_INTERVAL = 300  # seconds between LRU timestamp updates of a row
+_LEGACY_FILE = re.compile(r'^[0-9a-f]{96}$')
+
+
+class _CacheStore(object):
+    """
+    Single sqlite file holding every memoized result, with a byte size cap
+    enforced by least-recently-used eviction and a small in-process hot tier.
+    """
+
+    def __init__(self, path, max_size):
+        self.path = path
+        self.max_size = max_size
+        self._conn = None
+        self._lock = threading.RLock()
+        self._hot = OrderedDict()
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+            elif not os.path.exists(self.path):
+                self._remove_legacy_files(folder)
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS func_cache (key TEXT PRIMARY KEY, value BLOB, size INTEGER, created REAL, expires REAL, accessed REAL)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS func_cache_expires ON func_cache (expires)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS func_cache_accessed ON func_cache (accessed)')
+            self._conn.execute('DELETE FROM func_cache WHERE expires < ?', (time.time(),))
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _remove_legacy_files(folder):
+        # one pickle file per call was the previous storage format
+        for filename in os.listdir(folder):
+            if _LEGACY_FILE.match(filename):
+                try:
+                    os.remove(os.path.join(folder, filename))
+                except OSError:
+                    pass
+
+    def _remember(self, key, created, pickled):
+        self._hot.pop(key, None)
+        self._hot[key] = (created, pickled)
+        while len(self._hot) > HOT_CACHE_ITEMS:
+            self._hot.popitem(last=False)
+
+    def get(self, key, max_age):
+        with self._lock:
+            if key in self._hot:
+                created, pickled = self._hot[key]
+                if created >= max_age:
+                    self._remember(key, created, pickled)
+                    return True, pickled
+            conn = self._connect()
+            row = conn.execute('SELECT value, created, accessed FROM func_cache WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] < max_age:
+                return False, None
+            pickled, created, accessed = bytes(row[0]), row[1], row[2]
+            now = time.time()
+            if now - accessed > TOUCH_INTERVAL:
+                conn.execute('UPDATE func_cache SET accessed = ? WHERE key = ?', (now, key))
+                conn.commit()
+            self._remember(key, created, pickled)
+            return True, pickled
+
+    def set(self, key, pickled, ttl):
+        size = len(pickled)
+        if size > self.max_size:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO func_cache (key, value, size, created, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, sqlite3.Binary(pickled), size, now, now + ttl, now))
+            self._evict(conn)
+            conn.commit()
+            self._remember(key, now, pickled)
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM func_cache').fetchone()[0]
+        if total <= self.max_size:
+            return
+        conn.execute('DELETE FROM func_cache WHERE expires < ?', (time.time(),))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM func_cache').fetchone()[0]
+        target = self.max_size * 0.9
+        while total > target:
+            rows = conn.execute('SELECT key, size FROM func_cache ORDER BY accessed LIMIT 50').fetchall()
+            if not rows:
+                break
+            conn.executemany('DELETE FROM func_cache WHERE key = ?', [(row[0],) for row in rows])
+            for row in rows:
+                self._hot.pop(row[0], None)
+            total -= sum(row[1] for row in rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._hot.clear()
+
+
+_store = _CacheStore(cache_file, cache_max_size)
 
 
 def reset_cache():
     try:
+        _store.close()
         shutil.rmtree(cache_path)
         return True
     except Exception as e:
@@ -55,40 +174,31 @@ def _get_func(name, args=None, kwargs=None, cache_limit=1):
         args = []
     if kwargs is None:
         kwargs = {}
-    full_path = os.path.join(cache_path, _get_filename(name, args, kwargs))
-    if os.path.exists(full_path):
-        mtime = os.path.getmtime(full_path)
-        if mtime >= max_age:
-            if six.PY2:
-                with open(full_path, 'r') as f:
-                    pickled_result = f.read()
-            else:
-                with open(full_path, 'rb') as f:
-                    pickled_result = f.read()
+    try:
+        in_cache, pickled_result = _store.get(_get_key(name, args, kwargs), max_age)
+        if in_cache:
             return True, pickle.loads(pickled_result)
+    except Exception as e:
+        logger.log('Failure during cache read: %s' % (e), log_utils.LOGWARNING)
 
     return False, None
 
 
-def _save_func(name, args=None, kwargs=None, result=None):
+def _save_func(name, args=None, kwargs=None, result=None, cache_limit=1):
+    if not cache_enabled:
+        return
     try:
         if args is None:
             args = []
         if kwargs is None:
             kwargs = {}
-        pickled_result = pickle.dumps(result)
-        full_path = os.path.join(cache_path, _get_filename(name, args, kwargs))
-        if six.PY2:
-            with open(full_path, 'w') as f:
-                f.write(pickled_result)
-        else:
-            with open(full_path, 'wb') as f:
-                f.write(pickled_result)
+        pickled_result = pickle.dumps(result, protocol=2)
+        _store.set(_get_key(name, args, kwargs), pickled_result, cache_limit * 60 * 60)
     except Exception as e:
         logger.log('Failure during cache write: %s' % (e), log_utils.LOGWARNING)
 
 
-def _get_filename(name, args, kwargs):
+def _get_key(name, args, kwargs):
     if six.PY2:
         arg_hash = hashlib.md5(name).hexdigest() + hashlib.md5(str(args)).hexdigest() + hashlib.md5(str(kwargs)).hexdigest()
     else:
@@ -113,7 +223,7 @@ def cache_method(cache_limit):
             else:
                 logger.log('Calling cached method: |%s|%s|%s|' % (full_name, args, kwargs), log_utils.LOGDEBUG)
                 result = func(*args, **kwargs)
-                _save_func(full_name, real_args, kwargs, result)
+                _save_func(full_name, real_args, kwargs, result, cache_limit=cache_limit)
                 return result
         return memoizer
     return wrap
@@ -132,7 +242,7 @@ def cache_function(cache_limit):
             else:
                 logger.log('Calling cached function: |%s|%s|%s|' % (name, args, kwargs), log_utils.LOGDEBUG)
                 result = func(*args, **kwargs)
-                _save_func(name, args, kwargs, result)
+                _save_func(name, args, kwargs, result, cache_limit=cache_limit)
                 return result
         return memoizer
     return wrap
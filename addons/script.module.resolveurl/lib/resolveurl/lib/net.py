@@ -21,9 +21,10 @@ import json
 import random
 import re
 import six
-from six.moves import urllib_request, urllib_parse, urllib_error, urllib_response, http_cookiejar
+from six.moves import urllib_request, urllib_parse, urllib_error, urllib_response, http_cookiejar, http_client
 import socket
 import sys
+import threading
 import time
 from resolveurl.lib import kodi
 
@@ -63,6 +64,141 @@ def get_ua():
     return user_agent
 
 
+class _ConnectionPool(object):
+    """
+    Idle keep-alive connections shared by every :class:`Net` instance, keyed
+    by (connection class, host, ssl context), plus the last TLS session seen
+    for each key so new connections to the same host can resume it.
+    """
+    max_idle = 4
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._tls_sessions = {}
+
+    def acquire(self, key):
+        with self._lock:
+            conns = self._idle.get(key)
+            while conns:
+                conn, response = conns.pop()
+                # a connection can only be reused once its last body was read
+                if response.isclosed():
+                    return conn
+        return None
+
+    def release(self, key, conn, response):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            conns.append((conn, response))
+            while len(conns) > self.max_idle:
+                old_conn, old_response = conns.pop(0)
+                if old_response.isclosed():
+                    old_conn.close()
+
+    def get_tls_session(self, key):
+        return self._tls_sessions.get(key)
+
+    def set_tls_session(self, key, session):
+        if session is not None:
+            self._tls_sessions[key] = session
+
+
+_pool = _ConnectionPool()
+_ssl_contexts = {}
+
+
+def _get_ssl_context(verify):
+    """
+    SSL contexts are shared so pooled connections and TLS sessions can be
+    reused between :class:`Net` instances.
+    """
+    if verify not in _ssl_contexts:
+        import ssl
+        if verify:
+            ctx = ssl.create_default_context(cafile=CERT_FILE)
+        else:
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        ctx.set_alpn_protocols(['http/1.1'])
+        _ssl_contexts[verify] = ctx
+    return _ssl_contexts[verify]
+
+
+if six.PY3:
+    class _PooledHTTPSConnection(http_client.HTTPSConnection):
+        pool_key = None
+
+        def connect(self):
+            http_client.HTTPConnection.connect(self)
+            server_hostname = self._tunnel_host or self.host
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname,
+                                                  session=_pool.get_tls_session(self.pool_key))
+
+    def _keepalive_open(handler, conn_class, req, **conn_args):
+        """
+        Same contract as :meth:`urllib.request.AbstractHTTPHandler.do_open`,
+        but connections are taken from and returned to the shared pool
+        instead of being closed after every request.
+        """
+        host = req.host
+        if not host:
+            raise urllib_error.URLError('no host given')
+        headers = dict(req.unredirected_hdrs)
+        headers.update((k, v) for k, v in req.headers.items() if k not in headers)
+        headers = dict((name.title(), val) for name, val in headers.items())
+        headers['Connection'] = 'keep-alive'
+        key = (conn_class.__name__, host, id(conn_args.get('context')))
+
+        while True:
+            conn = _pool.acquire(key)
+            reused = conn is not None
+            if reused:
+                conn.timeout = req.timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(req.timeout)
+            else:
+                conn = conn_class(host, timeout=req.timeout, **conn_args)
+                conn.pool_key = key
+            conn.set_debuglevel(handler._debuglevel)
+            try:
+                try:
+                    conn.request(req.get_method(), req.selector, req.data, headers,
+                                 encode_chunked=req.has_header('Transfer-encoding'))
+                except OSError as err:
+                    raise urllib_error.URLError(err)
+                response = conn.getresponse()
+            except (OSError, http_client.HTTPException, urllib_error.URLError):
+                conn.close()
+                if reused:
+                    # the server dropped an idle keep-alive connection, retry on a new one
+                    continue
+                raise
+            break
+
+        if hasattr(conn.sock, 'session'):
+            _pool.set_tls_session(key, conn.sock.session)
+        if not response.will_close:
+            _pool.release(key, conn, response)
+        response.url = req.get_full_url()
+        response.msg = response.reason
+        return response
+
+    class KeepAliveHTTPHandler(urllib_request.HTTPHandler):
+        def http_open(self, req):
+            return _keepalive_open(self, http_client.HTTPConnection, req)
+
+    class KeepAliveHTTPSHandler(urllib_request.HTTPSHandler):
+        def https_open(self, req):
+            if req._tunnel_host:
+                return self.do_open(http_client.HTTPSConnection, req, context=self._context)
+            return _keepalive_open(self, _PooledHTTPSConnection, req, context=self._context)
+else:
+    KeepAliveHTTPHandler = urllib_request.HTTPHandler
+    KeepAliveHTTPSHandler = urllib_request.HTTPSHandler
+
+
 class NoRedirection(urllib_request.HTTPRedirectHandler):
     def http_error_302(self, req, fp, code, msg, headers):
         infourl = urllib_response.addinfourl(fp, headers, req.get_full_url() if six.PY2 else req.full_url)
@@ -80,7 +216,8 @@ class Net:
     """
     This class wraps :mod:`urllib2` and provides an easy way to make http
     requests while taking care of cookies, proxies, gzip compression and
-    character encoding.
+    character encoding. Connections are kept alive and reused between
+    requests to the same host.
 
     Example::
 
@@ -182,11 +319,6 @@ class Net:
         """
         handlers = [urllib_request.HTTPCookieProcessor(self._cj), urllib_request.HTTPBasicAuthHandler()]
 
-        if self._http_debug:
-            handlers += [urllib_request.HTTPHandler(debuglevel=1)]
-        else:
-            handlers += [urllib_request.HTTPHandler()]
-
         if self._proxy:
             handlers += [urllib_request.ProxyHandler({'http': self._proxy})]
 
@@ -196,33 +328,16 @@ class Net:
         except:
             node = ''
 
-        if not self._ssl_verify or node == 'xboxone':
-            try:
-                import ssl
-                ctx = ssl.create_default_context()
-                ctx.set_alpn_protocols(['http/1.1'])
-                ctx.check_hostname = False
-                ctx.verify_mode = ssl.CERT_NONE
-                if self._http_debug:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx, debuglevel=1)]
-                else:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx)]
-            except:
-                pass
-        else:
-            try:
-                import ssl
-                ctx = ssl.create_default_context(cafile=CERT_FILE)
-                ctx.set_alpn_protocols(['http/1.1'])
-                if self._http_debug:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx, debuglevel=1)]
-                else:
-                    handlers += [urllib_request.HTTPSHandler(context=ctx)]
-            except:
-                pass
+        debuglevel = 1 if self._http_debug else 0
+        self._transport = [KeepAliveHTTPHandler(debuglevel=debuglevel)]
+        try:
+            ctx = _get_ssl_context(self._ssl_verify and node != 'xboxone')
+            self._transport += [KeepAliveHTTPSHandler(context=ctx, debuglevel=debuglevel)]
+        except:
+            pass
 
-        opener = urllib_request.build_opener(*handlers)
-        urllib_request.install_opener(opener)
+        self._opener = urllib_request.build_opener(*(handlers + self._transport))
+        urllib_request.install_opener(self._opener)
 
     def http_GET(self, url, headers={}, compression=True, redirect=True, timeout=20):
         """
@@ -286,7 +401,7 @@ class Net:
         request.add_header('User-Agent', self._user_agent)
         for key in headers:
             request.add_header(key, headers[key])
-        response = urllib_request.urlopen(request)
+        response = self._opener.open(request)
         return HttpResponse(response)
 
     def http_DELETE(self, url, headers={}):
@@ -309,7 +424,7 @@ class Net:
         request.add_header('User-Agent', self._user_agent)
         for key in headers:
             request.add_header(key, headers[key])
-        response = urllib_request.urlopen(request)
+        response = self._opener.open(request)
         return HttpResponse(response)
 
     def _fetch(self, url, form_data={}, headers={}, compression=True, jdata=False, redirect=True, timeout=20):
@@ -354,10 +469,10 @@ class Net:
         req.add_unredirected_header('Host', host)
         try:
             if not redirect:
-                opener = urllib_request.build_opener(NoRedirection())
+                opener = urllib_request.build_opener(NoRedirection(), *self._transport)
                 response = opener.open(req, timeout=timeout)
             else:
-                response = urllib_request.urlopen(req, timeout=timeout)
+                response = self._opener.open(req, timeout=timeout)
         except urllib_error.HTTPError as e:
             if e.code == 403 and 'cloudflare' in e.hdrs.get('server', ''):
                 import ssl
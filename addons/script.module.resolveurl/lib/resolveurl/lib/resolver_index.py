@@ -0,0 +1,193 @@
+"""
+    ResolveURL Addon for Kodi
+    Copyright (C) 2016 t0mm0, tknorris
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Persistent domain -> plugin module index.
+
+The index is built once by importing every plugin module in a directory and
+recording the ``domains`` of the resolver classes it defines. It is stored in
+the addon profile and rebuilt only when the addon version or the plugin files
+(name, mtime, size) of a directory change, so later invocations only import
+the modules that can handle the requested domain.
+"""
+import os
+import sys
+import json
+import importlib
+import six
+from resolveurl.lib import kodi
+from resolveurl.lib import log_utils
+
+logger = log_utils.Logger.get_logger(__name__)
+
+INDEX_VERSION = 1
+WILDCARD = '*'
+
+try:
+    index_file = kodi.translate_path(os.path.join(kodi.get_profile(), 'resolver_index.json'))
+except Exception:
+    index_file = ''
+
+
+def _list_plugins(path):
+    try:
+        files = os.listdir(path)
+    except OSError:
+        return []
+    return sorted(f for f in files if not f.startswith('__') and f.endswith('.py'))
+
+
+def _signature(path):
+    sig = []
+    for filename in _list_plugins(path):
+        try:
+            st = os.stat(os.path.join(path, filename))
+            sig.append([filename, int(st.st_mtime), st.st_size])
+        except OSError:
+            continue
+    return sig
+
+
+class ResolverIndex(object):
+    """
+    Maps domains to the plugin modules that declare them.
+
+    ``get_classes`` is a callable returning every resolver class currently
+    loaded; it is used while (re)building to find which classes each module
+    defined.
+    """
+
+    def __init__(self, get_classes, path=None, version=''):
+        self._get_classes = get_classes
+        self._path = index_file if path is None else path
+        self._version = version
+        self._dirs = None
+        self._checked = set()
+        self._domain_cache = {}
+        self._loaded = set()
+
+    def _read(self):
+        if self._dirs is not None:
+            return
+        self._dirs = {}
+        if not self._path or not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path, 'r') as f:
+                data = json.load(f)
+            if data.get('index_version') == INDEX_VERSION and data.get('version') == self._version:
+                self._dirs = data.get('dirs', {})
+        except Exception as e:
+            logger.log_warning('Failed to read resolver index: %s' % e)
+
+    def _write(self):
+        if not self._path:
+            return
+        data = {'index_version': INDEX_VERSION, 'version': self._version, 'dirs': self._dirs}
+        try:
+            folder = os.path.dirname(self._path)
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+            tmp_path = self._path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            if os.path.exists(self._path):
+                os.remove(self._path)
+            os.rename(tmp_path, self._path)
+        except Exception as e:
+            logger.log_warning('Failed to write resolver index: %s' % e)
+
+    @staticmethod
+    def _module_name(filename, package):
+        mod_name = filename[:-3]
+        return '%s.%s' % (package, mod_name) if package else mod_name
+
+    def _import(self, module, path, package):
+        if module in self._loaded:
+            return True
+        if module not in sys.modules:
+            if not package and path not in sys.path:
+                sys.path.insert(0, path)
+            try:
+                imp = importlib.import_module(module)
+            except Exception as e:
+                logger.log_error('Failed to load resolver plugin %s: %s' % (module, e))
+                return False
+            if not package:
+                sys.modules[module] = imp
+            logger.log_debug('Loaded %s from %s' % (module, path))
+        self._loaded.add(module)
+        return True
+
+    def _build(self, path, package):
+        logger.log_debug('Building resolver index for %s' % path)
+        names = [self._module_name(f, package) for f in _list_plugins(path)]
+        for module in names:
+            self._import(module, path, package)
+
+        modules = dict((module, []) for module in names)
+        for klass in self._get_classes():
+            if klass.__module__ in modules:
+                domains = modules[klass.__module__]
+                domains.extend(d.lower() for d in klass.domains if d.lower() not in domains)
+        return {'package': package, 'signature': _signature(path), 'modules': modules}
+
+    def ensure(self, path, package=''):
+        """
+        Make sure ``path`` is indexed and the index is current. Returns True
+        if the directory had to be (re)indexed, which also means all of its
+        modules are now loaded.
+        """
+        if path in self._checked:
+            return False
+        self._read()
+        entry = self._dirs.get(path)
+        rebuilt = False
+        if entry is None or entry.get('package', '') != package or entry.get('signature') != _signature(path):
+            self._dirs[path] = self._build(path, package)
+            self._domain_cache = {}
+            self._write()
+            rebuilt = True
+        self._checked.add(path)
+        return rebuilt
+
+    def _candidates(self, domain, dirs):
+        key = (domain, tuple(dirs))
+        if key not in self._domain_cache:
+            candidates = []
+            for path, _package in dirs:
+                entry = self._dirs[path]
+                for module, domains in six.iteritems(entry['modules']):
+                    if WILDCARD in domains or (domain and any(domain in d for d in domains)):
+                        candidates.append((module, path, entry['package']))
+            self._domain_cache[key] = candidates
+        return self._domain_cache[key]
+
+    def load_domain(self, domain, dirs):
+        """
+        Import only the modules in ``dirs`` (a list of (path, package) tuples)
+        that can handle ``domain``, including universal '*' resolvers.
+        """
+        for path, package in dirs:
+            self.ensure(path, package)
+        for module, path, package in self._candidates(domain, dirs):
+            self._import(module, path, package)
+
+    def load_all(self, dirs):
+        for path, package in dirs:
+            if not self.ensure(path, package):
+                for module in self._dirs[path]['modules']:
+                    self._import(module, path, package)
@@ -120,5 +120,6 @@ STRINGS = {
     'cl_background': 33103,
     'not_premium': 33099,
     'clean_settings': 33101,
-    'settings_cleaned': 33102
+    'settings_cleaned': 33102,
+    'function_cache_size': 33104
 }
@@ -6,6 +6,7 @@ import base64
 import shutil
 import binascii
 import threading
+from collections import OrderedDict
 
 from xml.dom.minidom import parseString
 from functools import cmp_to_key
@@ -13,6 +14,7 @@ from functools import cmp_to_key
 import arrow
 from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
 from six.moves.socketserver import ThreadingMixIn
+from six.moves import queue
 from six.moves.urllib.parse import urlparse, urljoin, unquote_plus, parse_qsl
 from kodi_six import xbmc
 from pycaption import detect_format, WebVTTWriter
@@ -49,6 +51,19 @@ CODECS = [[re.compile(x[0], re.IGNORECASE), x[1]] for x in CODECS]
 
 ATTRIBUTELISTPATTERN = re.compile(r'''((?:[^,"']|"[^"]*"|'[^']*')+)''')
 DEFAULT_KID_PATTERN = re.compile(':default_KID="([0-9a-fA-F]{32})"')
+ABSOLUTE_URL_PATTERN = re.compile(r'https?://', re.IGNORECASE)
+M3U8_URI_PATTERN = re.compile(r'URI="(?!https?://)([^"]*)"', re.IGNORECASE)
+M3U8_QUOTED_URL_PATTERN = re.compile(r'"(?=https?://)', re.IGNORECASE)
+PLAIN_PATH_PATTERN = re.compile(r'(?:\w[\w\-~%=,+]*(?:\.[\w\-~%=,+]+)*/)*\w[\w\-~%=,+]*(?:\.[\w\-~%=,+]+)*(?:\?[^:#]+)?$')
+
+# rewritten manifests kept per session, reused while the upstream ETag / Last-Modified is unchanged
+MAX_CACHED_REWRITES = 20
+
+# segment prefetch (segment_prefetch setting)
+PREFETCH_WORKERS = 2
+MAX_PREFETCH_PLAYLISTS = 10
+MAX_SEGMENT_CACHE_BYTES = 64 * 1024 * 1024
+PREFETCH_SKIP_HEADERS = ('range', 'if-none-match', 'if-modified-since')
 
 DEFAULT_SESSION_NAME = 'playback'
 PROXY_GLOBAL = {
@@ -294,8 +309,39 @@ class RequestHandler(BaseHTTPRequestHandler):
             return
 
         try:
+            prefetched = self._prefetched_response(url)
+            if prefetched:
+                log.debug('Segment served from prefetch')
+                self._prefetch(url)
+                self._output_response(prefetched)
+                return
+
+            rewrite = self._cached_rewrite(url)
+            if rewrite and 'if-none-match' not in self._headers and 'if-modified-since' not in self._headers:
+                if rewrite['etag']:
+                    self._headers['if-none-match'] = rewrite['etag']
+                if rewrite['last_modified']:
+                    self._headers['if-modified-since'] = rewrite['last_modified']
+            else:
+                rewrite = None
+
             response = self._proxy_request('GET', url)
 
+            if rewrite and (response.status_code == 304 or (response.ok and self._validators(response) == (rewrite['etag'], rewrite['last_modified']))):
+                log.debug('Manifest unchanged. Using cached rewrite')
+                if url == manifest:
+                    PROXY_GLOBAL['error_count'] = 0
+                response.close()
+                response.status_code = 200
+                response.headers = rewrite['headers'].copy()
+                response.stream = ResponseStream(response)
+                response.stream.content = rewrite['content']
+                self._output_response(response)
+                return
+
+            if response.ok:
+                self._prefetch(url)
+
             if not self._session.get('type') and url == manifest:
                 if response.headers.get('content-type') == 'application/x-mpegURL':
                     self._session['type'] = 'm3u8'
@@ -311,9 +357,11 @@ class RequestHandler(BaseHTTPRequestHandler):
             parse = urlparse(self.path.lower())
             if self._session.get('type') == 'm3u8' and (url == manifest or parse.path.endswith('.m3u') or parse.path.endswith('.m3u8') or response.headers.get('content-type') == 'application/x-mpegURL'):
                 self._parse_m3u8(response)
+                self._cache_rewrite(url, response)
 
             elif self._session.get('type') == 'mpd' and url == manifest:
                 self._parse_dash(response)
+                self._cache_rewrite(url, response)
 
             elif self._session.get('type') == 'pls' and url == manifest:
                 self._parse_pls(response)
@@ -347,6 +395,73 @@ class RequestHandler(BaseHTTPRequestHandler):
 
         self._output_response(response)
 
+    def _validators(self, response):
+        return response.headers.get('etag'), response.headers.get('last-modified')
+
+    def _cached_rewrite(self, url):
+        rewrite = self._session.get('rewrites', {}).get(url)
+        if rewrite and rewrite['proxy_path'] == self.proxy_path:
+            return rewrite
+        return None
+
+    def _cache_rewrite(self, url, response):
+        etag, last_modified = self._validators(response)
+        if not response.ok or not (etag or last_modified):
+            return
+
+        rewrites = self._session.setdefault('rewrites', OrderedDict())
+        rewrites.pop(url, None)
+        rewrites[url] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'proxy_path': self.proxy_path,
+            'headers': response.headers.copy(),
+            'content': response.stream.content,
+        }
+        while len(rewrites) > MAX_CACHED_REWRITES:
+            rewrites.popitem(last=False)
+
+    def _prefetched_response(self, url):
+        if not self._session.get('segment_prefetch') or 'range' in self._headers:
+            return None
+
+        segment = SEGMENT_CACHE.get(url)
+        if not segment:
+            return None
+
+        # wait for a prefetch still in progress instead of requesting the segment twice
+        if not segment.done.wait(self._session.get('timeout') or 30) or segment.status_code != 200:
+            SEGMENT_CACHE.remove(url)
+            return None
+
+        response = Response()
+        response.headers = segment.headers.copy()
+        response.stream = ResponseStream(response)
+        response.stream.content = segment.content
+        return response
+
+    def _prefetch(self, url):
+        # queue the segments following url in its media playlist
+        count = self._session.get('segment_prefetch')
+        if not count or self._session.get('type') != 'm3u8' or 'range' in self._headers or not self._session.get('session'):
+            return
+
+        for playlist in self._session.get('playlists', {}).values():
+            index = playlist['index'].get(url)
+            if index is not None:
+                break
+        else:
+            return
+
+        headers = {}
+        for key in self._headers:
+            if key not in PREFETCH_SKIP_HEADERS:
+                headers[key] = self._headers[key]
+
+        for segment_url in playlist['segments'][index+1:index+1+count]:
+            if segment_url not in self._session.get('middleware', {}):
+                SEGMENT_PREFETCHER.add(self._session['session'], segment_url, headers)
+
     def _quality_select(self, qualities):
         def compare(a, b):
             if a['compatible'] > b['compatible']:
@@ -1040,11 +1155,14 @@ class RequestHandler(BaseHTTPRequestHandler):
     def _parse_m3u8_sub(self, m3u8, url):
         lines = []
         segments = []
+        rewrite = self._m3u8_line_rewriter(url)
+
+        # Remove sample-aes apple streaming
+        # See https://github.com/xbmc/inputstream.adaptive/issues/1007
+        remove_apple = 'urn:uuid:edef8ba9-79d6-4ace-a3c8-27dcd51d21ed' in m3u8
 
         def line_ok(line):
-            # Remove sample-aes apple streaming
-            # See https://github.com/xbmc/inputstream.adaptive/issues/1007
-            if 'com.apple.streamingkeydelivery' in line and 'urn:uuid:edef8ba9-79d6-4ace-a3c8-27dcd51d21ed' in m3u8:
+            if remove_apple and 'com.apple.streamingkeydelivery' in line:
                 return False
 
             # Remove x-disc lines (BREAKS DISNEY)
@@ -1064,8 +1182,8 @@ class RequestHandler(BaseHTTPRequestHandler):
                     continue
             else:
                 # below not needed with IA version >= 20.3.3 (https://github.com/xbmc/inputstream.adaptive/pull/1108)
-                segments.append(line.lower())
-                if '/beacon?' in line.lower() or '/beacon/' in line.lower():
+                lower = line.lower()
+                if '/beacon?' in lower or '/beacon/' in lower:
                     parse = urlparse(line)
                     params = dict(parse_qsl(parse.query))
                     for key in params:
@@ -1073,10 +1191,49 @@ class RequestHandler(BaseHTTPRequestHandler):
                             line = params[key]
                             log.debug('M3U8 Fix: Beacon removed')
 
+            line = rewrite(line)
+            if not line.startswith('#') and line.startswith(self.proxy_path):
+                segments.append(line[len(self.proxy_path):])
+
             lines.append(line)
 
+        # byte range playlists reuse the same url for every segment
+        if self._session.get('segment_prefetch') and segments and '#EXT-X-BYTERANGE' not in m3u8:
+            playlists = self._session.setdefault('playlists', OrderedDict())
+            playlists.pop(url, None)
+            playlists[url] = {'segments': segments, 'index': dict((segment, i) for i, segment in enumerate(segments))}
+            while len(playlists) > MAX_PREFETCH_PLAYLISTS:
+                playlists.popitem(last=False)
+
         return '\n'.join(lines)
 
+    def _m3u8_line_rewriter(self, base_url):
+        # returns a function making the urls in a line absolute and converting them to proxy paths
+        base_dir = urljoin(base_url, '.')
+        if not ABSOLUTE_URL_PATTERN.match(base_dir) or not base_dir.endswith('/'):
+            base_dir = None
+
+        def join(url):
+            # plain relative paths (segment names) skip the full urljoin
+            if base_dir and PLAIN_PATH_PATTERN.match(url):
+                return base_dir + url
+            return urljoin(base_url, url)
+
+        def rewrite(line):
+            if not line.startswith('#'):
+                if not ABSOLUTE_URL_PATTERN.match(line):
+                    line = join(line)
+                if ABSOLUTE_URL_PATTERN.match(line):
+                    line = self.proxy_path + line
+
+            if '"' in line:
+                line = M3U8_URI_PATTERN.sub(lambda match: 'URI="{}"'.format(join(match.group(1))), line)
+                line = M3U8_QUOTED_URL_PATTERN.sub(lambda match: '"' + self.proxy_path, line)
+
+            return line
+
+        return rewrite
+
     def _parse_m3u8_master(self, m3u8, manifest_url):
         manifest_update = self._session.get('manifest_init', False)
         self._session['manifest_init'] = True
@@ -1359,19 +1516,12 @@ class RequestHandler(BaseHTTPRequestHandler):
 
         if is_master:
             m3u8 = self._parse_m3u8_master(m3u8, response.url)
+            rewrite = self._m3u8_line_rewriter(response.url)
+            m3u8 = '\n'.join(rewrite(line) for line in m3u8.split('\n'))
         else:
+            # sub playlists are rewritten line by line as they are parsed
             m3u8 = self._parse_m3u8_sub(m3u8, response.url)
 
-        def relative_replace(match):
-            return match.group(0).replace(match.group(1), urljoin(response.url, match.group(1)))
-
-        m3u8 = re.sub(r'^(?!https?://)(?!#)(.*)$', relative_replace, m3u8, flags=re.I|re.M)
-        m3u8 = re.sub(r'URI="(?!https?://)(.*)"', relative_replace, m3u8, flags=re.I|re.M)
-
-        ## Convert to proxy paths
-        m3u8 = re.sub(r'^(https?)://', r'{}\1://'.format(self.proxy_path), m3u8, flags=re.I|re.M)
-        m3u8 = re.sub(r'"(https?)://', r'"{}\1://'.format(self.proxy_path), m3u8, flags=re.I|re.M)
-
         m3u8 = m3u8.encode('utf8')
         response.stream.content = m3u8
 
@@ -1424,6 +1574,7 @@ class RequestHandler(BaseHTTPRequestHandler):
                 timeout = self._session.get('timeout'),
                 ip_mode = self._session.get('ip_mode'),
                 auto_close = False,
+                shared_pool = True,
             )
             self._session['session'].set_dns_rewrites(self._session.get('dns_rewrites', []))
             self._session['session'].set_proxy(self._session.get('proxy_server'))
@@ -1587,18 +1738,127 @@ class ResponseStream(object):
         if self._bytes is not None:
             yield self._bytes
         else:
+            # 4096 best for shoutcast streams and quick playback start
+            # grow while reads fill quickly (segments) and shrink again when they stall
+            chunk_size = 4096
             while True:
+                start = time.time()
                 try:
-                    # 4096 best for shoutcast streams and quick playback start
-                    chunk = self._response.raw.read(4096)
+                    chunk = self._response.raw.read(chunk_size)
                 except:
                     chunk = None
 
                 if not chunk:
                     break
 
+                elapsed = time.time() - start
                 yield chunk
 
+                if elapsed < 0.1 and len(chunk) == chunk_size:
+                    chunk_size = min(chunk_size * 2, CHUNK_SIZE)
+                elif elapsed > 0.5:
+                    chunk_size = max(chunk_size // 2, 4096)
+
+
+class PrefetchedSegment(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.status_code = None
+        self.headers = {}
+        self.content = b''
+
+
+class SegmentCache(object):
+    # memory bounded LRU of prefetched segments
+    def __init__(self, max_bytes):
+        self._max_bytes = max_bytes
+        self._segments = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            segment = self._segments.pop(url, None)
+            if segment:
+                self._segments[url] = segment
+            return segment
+
+    def add(self, url):
+        # returns a new in progress segment, or None if url is already cached
+        with self._lock:
+            if url in self._segments:
+                return None
+            segment = self._segments[url] = PrefetchedSegment()
+            return segment
+
+    def finish(self, url, segment):
+        with self._lock:
+            if self._segments.get(url) is segment:
+                self._size += len(segment.content)
+                while self._size > self._max_bytes and len(self._segments) > 1:
+                    old_url, old_segment = self._segments.popitem(last=False)
+                    self._size -= len(old_segment.content)
+        segment.done.set()
+
+    def remove(self, url):
+        with self._lock:
+            segment = self._segments.pop(url, None)
+            if segment:
+                self._size -= len(segment.content)
+
+    def clear(self):
+        with self._lock:
+            self._segments.clear()
+            self._size = 0
+
+
+class SegmentPrefetcher(object):
+    def __init__(self, cache, workers):
+        self._cache = cache
+        self._workers = workers
+        self._threads = []
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def add(self, session, url, headers):
+        segment = self._cache.add(url)
+        if not segment:
+            return
+
+        self._queue.put((session, url, headers, segment))
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if len(self._threads) < self._workers:
+                thread = threading.Thread(target=self._worker)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            try:
+                session, url, headers, segment = self._queue.get(timeout=30)
+            except queue.Empty:
+                return
+
+            try:
+                log.debug('PREFETCH: {}'.format(url))
+                response = session.request(method='GET', url=fix_url(url), headers=headers)
+                segment.status_code = response.status_code
+                if response.ok:
+                    for header in response.headers:
+                        if header.lower() not in REMOVE_OUT_HEADERS and header.lower() not in ('set-cookie', 'content-encoding', 'content-range'):
+                            segment.headers[header.lower()] = response.headers[header]
+                    segment.content = response.content
+            except Exception as e:
+                log.debug('Prefetch failed: {}'.format(e))
+            finally:
+                self._cache.finish(url, segment)
+
+
+SEGMENT_CACHE = SegmentCache(MAX_SEGMENT_CACHE_BYTES)
+SEGMENT_PREFETCHER = SegmentPrefetcher(SEGMENT_CACHE, PREFETCH_WORKERS)
+
 
 def save_session():
     # persist session across service restarts
@@ -1606,6 +1866,8 @@ def save_session():
     if not session:
         return
 
+    session.pop('rewrites', None)
+    session.pop('playlists', None)
     requests_session = session.pop('session', None)
     if requests_session:
         session['cookies'] = requests_session.cookies.get_dict()
@@ -1661,6 +1923,7 @@ class Proxy(object):
         self._server.socket.close()
         self._httpd_thread.join()
         self.started = False
+        SEGMENT_CACHE.clear()
 
         try:
             save_session()
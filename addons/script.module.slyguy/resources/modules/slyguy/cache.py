@@ -4,7 +4,7 @@ from functools import wraps
 import peewee
 
 from slyguy import database, settings, signals, gui, router, log, _
-from slyguy.constants import CACHE_TABLENAME, CACHE_EXPIRY, CACHE_CHECKSUM, ROUTE_CLEAR_CACHE
+from slyguy.constants import CACHE_TABLENAME, CACHE_EXPIRY, CACHE_CHECKSUM, CACHE_CLEAN_INTERVAL, CACHE_CLEAN_KEY, CACHE_CLEAN_BATCH, ROUTE_CLEAR_CACHE
 from slyguy.util import hash_6
 
 funcs = []
@@ -14,7 +14,7 @@ class Cache(database.Model):
 
     key     = database.HashField(unique=True)
     value   = database.PickleField()
-    expires = peewee.IntegerField()
+    expires = peewee.IntegerField(index=True)
 
     class Meta:
         table_name = CACHE_TABLENAME
@@ -103,9 +103,19 @@ def empty():
 
 @signals.on(signals.BEFORE_DISPATCH)
 def remove_expired():
-    deleted = Cache.delete_where(Cache.expires < int(time()))
+    # the clean key row expires when the next clean is due, so until then this is a single indexed read
+    now = int(time())
+    if Cache.select().where(Cache.key == CACHE_CLEAN_KEY, Cache.expires > now).exists():
+        return
+
+    expired = Cache.select(Cache.id).where(Cache.expires <= now).limit(CACHE_CLEAN_BATCH)
+    deleted = Cache.delete_where(Cache.id.in_(expired))
     log('Cache: Deleted {} Expired Rows'.format(deleted))
 
+    # a full batch may have left more expired rows, continue on the next dispatch
+    if deleted < CACHE_CLEAN_BATCH:
+        Cache.set(key=CACHE_CLEAN_KEY, value=now, expires=now + CACHE_CLEAN_INTERVAL)
+
 @router.route(ROUTE_CLEAR_CACHE)
 def clear_cache(key, **kwargs):
     delete_count = delete(key)
@@ -71,6 +71,8 @@ CACHE_CHECKSUM       = ADDON_VERSION # Recreates cache when new addon version
 CACHE_EXPIRY         = (60*60*24) # 24 Hours
 CACHE_CLEAN_INTERVAL = (60*60*4)  # 4 Hours
 CACHE_CLEAN_KEY      = '_cache_cleaned'
+CACHE_CLEAN_BATCH    = 500 # Max expired rows deleted per dispatch
+MEM_CACHE_MAX_SIZE   = 8*1024*1024 # Estimated size of all mem_cache values
 #################
 
 IPTV_MERGE_ID        = 'plugin.program.iptv.merge'
@@ -141,6 +143,8 @@ WIDEVINE_PSSH = bytearray([112, 115, 115, 104])
 
 DEFAULT_USERAGENT = 'okhttp/4.9.3'
 DEFAULT_WORKERS = 5
+MAX_POOL_WORKERS = 20 # Shared by all async_tasks calls
+POOL_IDLE_TIMEOUT = 30 # Seconds before an idle pool thread exits
 
 #### BOOKMARKS #####
 BOOKMARK_FILE = os.path.join(ADDON_PROFILE, 'bookmarks.json')
@@ -155,6 +159,9 @@ EMPTY_TS = 'empty.ts' if KODI_VERSION < 19 else ''
 #################
 
 CHUNK_SIZE = 64 * 1024
+DOWNLOAD_PARTS = 4 # Concurrent range requests per chunked_dl
+DOWNLOAD_MIN_PART_SIZE = 4 * 1024 * 1024
+DOWNLOAD_PART_ATTEMPTS = 3
 INVALID_IPS = ['0.0.0.0', '::']
 LIVE_HEAD = 25*60*60
 NEWS_MAX_TIME = 432000 #5 Days
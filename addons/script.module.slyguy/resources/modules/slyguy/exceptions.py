@@ -36,3 +36,14 @@ class RouterError(Error):
 
 class SessionError(Error):
     pass
+
+
+class TaskTimeout(Error):
+    pass
+
+
+class TasksError(Error):
+    def __init__(self, errors, results, *args, **kwargs):
+        self.errors = errors
+        self.results = results
+        super(TasksError, self).__init__(*args, **kwargs)
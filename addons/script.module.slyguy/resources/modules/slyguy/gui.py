@@ -444,6 +444,7 @@ class Item(object):
                     'subs_forced': settings.getBool('subs_forced', True),
                     'subs_non_forced': settings.getBool('subs_non_forced', True),
                     'remove_framerate': settings.REMOVE_FRAMERATE.value,
+                    'segment_prefetch': settings.SEGMENT_PREFETCH.value,
                     'subtitles': [],
                     'path_subs': {},
                     'addon_id': ADDON_ID,
@@ -317,6 +317,7 @@ class BaseLanguage(object):
     EXTRAS                      = 32229
     REMOVE_FRAMERATE            = 32230
     KEEP_ALIVE_ENABLED          = 32231
+    SEGMENT_PREFETCH            = 32232
 
     def __init__(self):
         self._addon_map = {}    
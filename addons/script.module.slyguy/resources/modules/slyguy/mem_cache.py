@@ -1,40 +1,91 @@
+import sys
+import threading
 from time import time
 from functools import wraps
 from copy import deepcopy
+from collections import OrderedDict
 
 from six.moves import cPickle
 
 from slyguy import signals, router
 from slyguy.log import log
 from slyguy.util import hash_6, set_kodi_string, get_kodi_string
-from slyguy.constants import ADDON_ID, CACHE_EXPIRY, ROUTE_CLEAR_CACHE, ADDON_VERSION, KODI_VERSION
+from slyguy.constants import ADDON_ID, CACHE_EXPIRY, ROUTE_CLEAR_CACHE, ADDON_VERSION, KODI_VERSION, MEM_CACHE_MAX_SIZE
 
 
 cache_key = 'cache.'+ADDON_ID+ADDON_VERSION
 class Cache(object):
     data = None
+    size = 0
 cache = Cache()
+# get() reorders rows, so every access to cache.data / cache.size holds the lock (proxy threads share the cache)
+CACHE_LOCK = threading.Lock()
+
+# rows are [value, expires, copy, size] kept in least recently used order
+VALUE, EXPIRES, COPY, SIZE = range(4)
 
 
 def _get_cache():
     if cache.data is None:
-        cache.data = {}
+        cache.data = OrderedDict()
+        cache.size = 0
 
         if KODI_VERSION < 18:
             data = get_kodi_string(cache_key)
             if data:
                 set_kodi_string(cache_key, "")
                 try:
-                    cache.data = cPickle.loads(data.encode('latin1')) or {}
+                    data = cPickle.loads(data.encode('latin1')) or {}
                 except Exception as e:
                     log.debug('Memcache: load failed: {}'.format(e))
                 else:
+                    for key in data:
+                        if len(data[key]) == 4:
+                            cache.data[key] = data[key]
+                            cache.size += data[key][SIZE]
                     log.debug("Memcache: loaded from kodi string")
 
     return cache.data
 
 
-def set(key, value, expires=CACHE_EXPIRY):
+def _size_of(value):
+    # pickled size is a cheap (much cheaper than deepcopy) estimate of the memory used by a shared value
+    try:
+        return len(cPickle.dumps(value, protocol=-1))
+    except Exception:
+        return sys.getsizeof(value, 0)
+
+
+def _copy_with_size(value):
+    # the deepcopy memo already holds every container copied, so summing their sizes costs next to nothing
+    memo = {}
+    copied = deepcopy(value, memo)
+    memo.pop(id(memo), None)
+    return copied, sum(sys.getsizeof(obj, 0) for obj in memo.values()) or sys.getsizeof(copied, 0)
+
+
+def _touch(data, key):
+    # mark key as most recently used
+    try:
+        data.move_to_end(key)
+    except AttributeError:
+        #python2
+        data[key] = data.pop(key)
+
+
+def _remove(data, key):
+    row = data.pop(key, None)
+    if row is not None:
+        cache.size -= row[SIZE]
+    return row
+
+
+def set(key, value, expires=CACHE_EXPIRY, copy=True):
+    """
+    Cache value under key. With copy=False the value itself is stored and
+    shared with every get(), so it must not be mutated by the caller or by
+    anyone reading it back.
+    """
     if expires == 0:
         return
 
@@ -42,35 +93,69 @@ def set(key, value, expires=CACHE_EXPIRY):
         expires = int(time() + expires)
 
     log('Cache Set: {}'.format(key))
-    _get_cache()[key] = [deepcopy(value), expires]
+    if copy:
+        row = [None, expires, copy, 0]
+        row[VALUE], row[SIZE] = _copy_with_size(value)
+    else:
+        row = [value, expires, copy, _size_of(value)]
 
+    evicted = []
+    with CACHE_LOCK:
+        data = _get_cache()
+        _remove(data, key)
+        data[key] = row
+        cache.size += row[SIZE]
 
-def get(key, default=None):
-    cache = _get_cache()
-    try:
-        row = cache[key]
-    except KeyError:
-        return default
+        # evict least recently used rows over the size limit (always keep the newest)
+        while cache.size > MEM_CACHE_MAX_SIZE and len(data) > 1:
+            old_key = next(iter(data))
+            evicted.append(old_key)
+            _remove(data, old_key)
 
-    if row[1] != None and row[1] < time():
-        cache.pop(key, None)
-        return default
-    else:
-        log('Cache Hit: {}'.format(key))
-        return deepcopy(row[0])
+    for old_key in evicted:
+        log('Cache Evict: {}'.format(old_key))
+
+
+def get(key, default=None, copy=None):
+    """
+    Return a copy of the cached value, or the shared value itself if it was set with copy=False.
+    Pass copy=True to always get a copy that is safe to mutate.
+    """
+    with CACHE_LOCK:
+        data = _get_cache()
+        row = data.get(key)
+        if row is None:
+            return default
+
+        if row[EXPIRES] != None and row[EXPIRES] < time():
+            _remove(data, key)
+            return default
+
+        _touch(data, key)
+
+    log('Cache Hit: {}'.format(key))
+
+    if copy or (copy is None and row[COPY]):
+        return deepcopy(row[VALUE])
+    return row[VALUE]
 
 
 def delete(key):
-    if int(_get_cache().pop(key, None) != None):
+    with CACHE_LOCK:
+        row = _remove(_get_cache(), key)
+
+    if row != None:
         log('Cache Delete: {}'.format(key))
         return True
     return False
 
 
 def empty():
-    cache = _get_cache()
-    deleted = len(cache)
-    cache.clear()
+    with CACHE_LOCK:
+        data = _get_cache()
+        deleted = len(data)
+        data.clear()
+        cache.size = 0
     log('Memcache: Deleted {} Rows'.format(deleted))
 
 
@@ -108,7 +193,7 @@ def _build_key(func_name, *args, **kwargs):
 
 
 def cached(*args, **kwargs):
-    def decorator(f, expires=CACHE_EXPIRY, key=None):
+    def decorator(f, expires=CACHE_EXPIRY, key=None, copy=True):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             _key = key or kwargs.pop('_cache_key', None) or _build_key(f.__name__, *args, **kwargs)
@@ -116,14 +201,14 @@ def cached(*args, **kwargs):
                 _key = _key(*args, **kwargs)
 
             if not kwargs.pop('_skip_cache', False):
-                value = get(_key)
+                value = get(_key, copy=copy)
                 if value != None:
                     log('Cache Hit: {}'.format(_key))
                     return value
 
             value = f(*args, **kwargs)
             if value != None:
-                set(_key, value, expires)
+                set(_key, value, expires, copy=copy)
 
             return value
 
@@ -136,7 +221,9 @@ def cached(*args, **kwargs):
 def remove_expired():
     if KODI_VERSION < 18:
         log('Memcache: persisting via kodi string')
-        set_kodi_string(cache_key, cPickle.dumps(cache.data or {}, protocol=0).decode('latin1'))
+        with CACHE_LOCK:
+            data = cPickle.dumps(cache.data or {}, protocol=0)
+        set_kodi_string(cache_key, data.decode('latin1'))
 
 
 @router.route(ROUTE_CLEAR_CACHE)
@@ -7,21 +7,22 @@ import time
 import os
 import functools
 import random
+import threading
 from gzip import GzipFile
 from ssl import OPENSSL_VERSION
 
 import requests
 import urllib3
-from six import BytesIO
+from six import BytesIO, string_types
 from six.moves.urllib_parse import urlparse
 from kodi_six import xbmc
 import dns.resolver
 
 from slyguy import userdata, settings, signals, mem_cache, log, _
-from slyguy.util import get_kodi_proxy, remove_duplicates
+from slyguy.util import get_kodi_proxy, remove_duplicates, iter_tasks, md5sum, remove_file
 from slyguy.smart_urls import get_dns_rewrites
 from slyguy.exceptions import SessionError, Error
-from slyguy.constants import DEFAULT_USERAGENT, CHUNK_SIZE, KODI_VERSION, DEPENDENCIES_ADDON_ID, INVALID_IPS
+from slyguy.constants import DEFAULT_USERAGENT, CHUNK_SIZE, KODI_VERSION, DEPENDENCIES_ADDON_ID, INVALID_IPS, DOWNLOAD_PARTS, DOWNLOAD_MIN_PART_SIZE, DOWNLOAD_PART_ATTEMPTS
 from slyguy.settings import IPMode
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -50,6 +51,10 @@ DNS_CACHE = dns.resolver.Cache()
 _real_getaddrinfo = socket.getaddrinfo
 
 
+class RangesUnsupported(Exception):
+    pass
+
+
 def json_override(func, error_msg):
     try:
         return func()
@@ -72,7 +77,7 @@ class DOHResolver(object):
         ip_type = 'AAAA' if family == socket.AF_INET6 else 'A'
         for server in self.nameservers:
             key = (server, host, ip_type)
-            ips = mem_cache.get(key, None)
+            ips = mem_cache.get(key, None, copy=False)
 
             if ips is None:
                 headers = {'accept': 'application/dns-json'}
@@ -90,7 +95,7 @@ class DOHResolver(object):
                 suitable = [x for x in data['Answer'] if x['type'] == ip_type]
                 ttl = min([x['TTL'] for x in suitable])
                 ips = [x['data'] for x in suitable]
-                mem_cache.set(key, ips, expires=ttl)
+                mem_cache.set(key, ips, expires=ttl, copy=False)
 
             if ips:
                 return ips
@@ -122,11 +127,23 @@ class DNSResolver(dns.resolver.Resolver):
 
 class SessionAdapter(requests.adapters.HTTPAdapter):
     def __init__(self):
-        self.session_data = {}
+        self._local = threading.local()
+        self._session_data = {}
         self._context_cache = {}
         super(SessionAdapter, self).__init__()
 
+    # session data is per thread as an adapter can be used by multiple threads (and sessions) at once
+    @property
+    def session_data(self):
+        return getattr(self._local, 'session_data', self._session_data)
+
+    @session_data.setter
+    def session_data(self, session_data):
+        self._local.session_data = self._session_data = session_data
+
     def send(self, *args, **kwargs):
+        # requests applies verify / cert to the connection pool after getting it, so they must be part of the pool key
+        self._local.tls = (kwargs.get('verify', True), kwargs.get('cert'))
         try:
             return super(SessionAdapter, self).send(*args, **kwargs)
         except requests.exceptions.ConnectionError as e:
@@ -184,6 +201,19 @@ class SessionAdapter(requests.adapters.HTTPAdapter):
         request_context['ssl_context'] = self._context_cache[context_key] = context
         pool_key = pool_key._replace(key_ssl_context=context_key)
 
+        if pool_key.key_scheme == 'https':
+            verify, cert = getattr(self._local, 'tls', (True, None))
+            if cert and not isinstance(cert, string_types):
+                cert_file, key_file = cert
+            else:
+                cert_file, key_file = cert, None
+            pool_key = pool_key._replace(
+                key_cert_reqs='CERT_REQUIRED' if verify else 'CERT_NONE',
+                key_ca_certs=verify if verify and verify is not True else None,
+                key_cert_file=cert_file or None,
+                key_key_file=key_file or None,
+            )
+
         if self.session_data['interface_ip']:
             request_context['source_address'] = (self.session_data['interface_ip'], 0)
             pool_key = pool_key._replace(key_source_address=request_context['source_address'])
@@ -265,8 +295,19 @@ class SessionAdapter(requests.adapters.HTTPAdapter):
         return addresses
 
 
+SHARED_ADAPTERS = {}
+SHARED_ADAPTERS_LOCK = threading.Lock()
+def shared_adapter(ip_mode=None, interface_ip=None):
+    # connection pools are keyed by scheme, host, port and tls settings (incl. verify / client cert) so can be shared between sessions
+    key = (ip_mode, interface_ip)
+    with SHARED_ADAPTERS_LOCK:
+        if key not in SHARED_ADAPTERS:
+            SHARED_ADAPTERS[key] = SessionAdapter()
+        return SHARED_ADAPTERS[key]
+
+
 class RawSession(requests.Session):
-    def __init__(self, verify=None, timeout=None, auto_close=True, ssl_ciphers=SSL_CIPHERS, ssl_options=SSL_OPTIONS, proxy=None, ip_mode=None, interface_ip=None):
+    def __init__(self, verify=None, timeout=None, auto_close=True, ssl_ciphers=SSL_CIPHERS, ssl_options=SSL_OPTIONS, proxy=None, ip_mode=None, interface_ip=None, shared_pool=False):
         if DEPENDENCIES_ADDON_ID.lower() not in str(urllib3).lower():
             raise SessionError("{} must be imported from slyguy.dependencies. sys.path issue?".format(str(urllib3)))
 
@@ -281,11 +322,15 @@ class RawSession(requests.Session):
         self._cert = None
         self._ssl_ciphers = ssl_ciphers
         self._ssl_options = ssl_options
+        self._shared_pool = shared_pool
 
         if auto_close:
             OPEN_SESSIONS.append(self)
 
-        self._adapter = SessionAdapter()
+        if shared_pool:
+            self._adapter = shared_adapter(ip_mode, interface_ip)
+        else:
+            self._adapter = SessionAdapter()
         for prefix in ('http://', 'https://'):
             self.mount(prefix, self._adapter)
 
@@ -365,7 +410,9 @@ class RawSession(requests.Session):
         return self._proxy
 
     def close(self):
-        super(RawSession, self).close()
+        # leave a shared connection pool open for other sessions
+        if not getattr(self, '_shared_pool', False):
+            super(RawSession, self).close()
         if self in OPEN_SESSIONS:
             OPEN_SESSIONS.remove(self)
 
@@ -558,18 +605,125 @@ class Session(RawSession):
             userdata.delete(self._cookies_key)
         self.cookies.clear()
 
-    def chunked_dl(self, url, dst_path, method='GET', **kwargs):
+    def chunked_dl(self, url, dst_path, method='GET', parts=DOWNLOAD_PARTS, md5=None, **kwargs):
+        """
+        Download url to dst_path.
+        Large files from servers accepting byte ranges are fetched with up to parts concurrent range requests,
+        each resuming from where it stopped if its connection fails. Other responses are downloaded as a single stream.
+        If md5 is given, a file not matching it is removed and a SessionError raised.
+        """
         kwargs['stream'] = True
         kwargs['return_json'] = False
         resp = self.request(method, url, **kwargs)
         resp.raise_for_status()
 
-        with open(dst_path, 'wb') as f:
-            for chunk in resp.iter_content(CHUNK_SIZE):
-                f.write(chunk)
+        ranges = self._dl_ranges(resp, parts) if method.upper() == 'GET' else None
+        if ranges:
+            try:
+                self._ranged_dl(resp, dst_path, ranges, **kwargs)
+            except RangesUnsupported as e:
+                log.debug('Ranged download failed ({}). Downloading as single stream'.format(e))
+                ranges = None
+                resp = self.request(method, url, **kwargs)
+                resp.raise_for_status()
+
+        if not ranges:
+            with open(dst_path, 'wb') as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+
+        if md5:
+            checksum = md5sum(dst_path)
+            if checksum != md5:
+                remove_file(dst_path)
+                raise SessionError(_(_.MD5_MISMATCH, filename=os.path.basename(dst_path), local_md5=checksum, remote_md5=md5))
 
         return resp
 
+    @staticmethod
+    def _dl_ranges(resp, parts):
+        headers = resp.headers
+        if parts < 2 or resp.status_code != 200 or headers.get('accept-ranges', '').lower() != 'bytes' \
+                or headers.get('content-encoding', 'identity').lower() != 'identity':
+            return None
+
+        try:
+            size = int(headers['content-length'])
+        except (KeyError, ValueError):
+            return None
+
+        part_size = max(-(-size // parts), DOWNLOAD_MIN_PART_SIZE)
+        if part_size >= size:
+            return None
+
+        return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+    def _ranged_dl(self, resp, dst_path, ranges, **kwargs):
+        headers = dict(kwargs.pop('headers', None) or {})
+        # If-Range makes a server whose file changed send all of it (200) instead of a range from the new file
+        validator = resp.headers.get('etag') or resp.headers.get('last-modified')
+        if validator and not validator.startswith('W/'):
+            headers['If-Range'] = validator
+
+        url = resp.url
+        abort = threading.Event()
+
+        with open(dst_path, 'wb') as f:
+            f.truncate(ranges[-1][1] + 1)
+
+        def download_part(start, end, part_resp=None):
+            pos = start
+            failures = 0
+            while True:
+                resume_pos = pos
+                try:
+                    if part_resp is None:
+                        part_headers = dict(headers, Range='bytes={}-{}'.format(pos, end))
+                        part_resp = self.request('GET', url, headers=part_headers, **kwargs)
+                        content_range = part_resp.headers.get('content-range', '')
+                        if part_resp.status_code != 206 or not content_range.startswith('bytes {}-{}/'.format(pos, end)):
+                            raise RangesUnsupported('HTTP {} for bytes {}-{}'.format(part_resp.status_code, pos, end))
+
+                    with open(dst_path, 'r+b') as f:
+                        f.seek(pos)
+                        for chunk in part_resp.iter_content(CHUNK_SIZE):
+                            if abort.is_set():
+                                return
+                            chunk = chunk[:end + 1 - pos]
+                            f.write(chunk)
+                            pos += len(chunk)
+                            if pos > end:
+                                return
+
+                    raise SessionError('Connection closed at byte {} of {}-{}'.format(pos, start, end))
+                except RangesUnsupported:
+                    raise
+                except Exception as e:
+                    # Only attempts that got no further count towards the limit
+                    failures = 0 if pos > resume_pos else failures + 1
+                    if failures >= DOWNLOAD_PART_ATTEMPTS or abort.is_set():
+                        raise
+                    log.debug('Resuming bytes {}-{} after error: {}'.format(pos, end, e))
+                finally:
+                    if part_resp is not None:
+                        part_resp.close()
+                        part_resp = None
+
+        # The first part is read from the response we already have
+        tasks = [functools.partial(download_part, start, end) for start, end in ranges]
+        tasks[0] = functools.partial(download_part, ranges[0][0], ranges[0][1], resp)
+        log.debug('Downloading {} bytes in {} parts'.format(ranges[-1][1] + 1, len(tasks)))
+
+        error = None
+        for index, result in iter_tasks(tasks, workers=len(tasks), raise_on_error=False):
+            if isinstance(result, Exception) and error is None:
+                error = result
+                abort.set()
+
+        if error is not None:
+            remove_file(dst_path)
+            raise error
+
 def gdrivedl(url, dst_path):
     ID_PATTERNS = [
         re.compile('/file/d/([0-9A-Za-z_-]{10,})(?:/|$)', re.IGNORECASE),
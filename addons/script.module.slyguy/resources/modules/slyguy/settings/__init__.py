@@ -279,6 +279,7 @@ class CommonSettings(BaseSettings):
     # PLAYER / ADVANCED
     REINSTALL_WV = Action("RunPlugin(plugin://{}/?_=_ia_install)".format(COMMON_ADDON_ID), visible=get_system() not in ('Android', 'WebOS'), category=Categories.PLAYER_ADVANCED)
     REMOVE_FRAMERATE = Bool('remove_framerate', default=False, owner=COMMON_ADDON_ID, category=Categories.PLAYER_ADVANCED)
+    SEGMENT_PREFETCH = Number('segment_prefetch', default=0, default_label=_.DISABLED, lower_limit=0, upper_limit=5, owner=COMMON_ADDON_ID, category=Categories.PLAYER_ADVANCED)
     #CONVERT_FRAMERATE = Bool('convert_framerate', disable=False)
     LIVE_PLAY_TYPE = Enum('live_play_type', options=[[_.PLAY_FROM_ASK, PLAY_FROM_ASK], [_.PLAY_FROM_LIVE_CONTEXT, PLAY_FROM_LIVE], [_.PLAY_FROM_BEGINNING, PLAY_FROM_START]],
                     loop=True, default=PLAY_FROM_ASK, owner=COMMON_ADDON_ID, category=Categories.PLAYER_ADVANCED)
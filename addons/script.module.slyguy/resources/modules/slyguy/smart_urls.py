@@ -26,7 +26,7 @@ def get_dns_rewrites(dns_rewrites=None, addon_id=ADDON_ID):
     return rewrites
 
 
-@cached(expires=60*5)
+@cached(expires=60*5, copy=False)
 def _get_url(url):
     log.debug('Request DNS URL: {}'.format(url))
     return requests.get(url).text
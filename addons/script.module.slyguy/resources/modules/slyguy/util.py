@@ -36,7 +36,7 @@ except ImportError:
 
 
 from slyguy import log, router, monitor, _
-from slyguy.exceptions import Error
+from slyguy.exceptions import Error, TaskTimeout, TasksError
 from slyguy.constants import *
 
 
@@ -140,53 +140,141 @@ def kodi_db(name):
         return None
 
 
-def async_tasks(tasks, workers=DEFAULT_WORKERS, raise_on_error=True):
-    def worker():
-        while not task_queue.empty():
-            task, index = task_queue.get_nowait()
+class TaskPool(object):
+    """Process wide pool of daemon threads shared by all async_tasks / iter_tasks calls"""
+    def __init__(self, max_workers=MAX_POOL_WORKERS, idle_timeout=POOL_IDLE_TIMEOUT):
+        self._max_workers = max_workers
+        self._idle_timeout = idle_timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._threads = 0
+        self._idle = 0
+
+    def submit(self, func):
+        with self._lock:
+            self._queue.put(func)
+            # tasks submitted from a pool thread (nested calls) may go over the limit so they cant deadlock
+            if self._queue.qsize() > self._idle and (self._threads < self._max_workers or getattr(self._local, 'worker', False)):
+                self._threads += 1
+                thread = threading.Thread(target=self._worker)
+                thread.daemon = True
+                thread.start()
+
+    def _worker(self):
+        self._local.worker = True
+        while True:
+            with self._lock:
+                self._idle += 1
+
             try:
-                resp_queue.put([task(), index])
-            except Exception as e:
-                resp_queue.put([e, index])
-            finally:
-                task_queue.task_done()
+                func = self._queue.get(timeout=self._idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._idle -= 1
+                    if self._queue.empty():
+                        self._threads -= 1
+                        return
+                continue
+
+            with self._lock:
+                self._idle -= 1
+
+            func()
+
+TASK_POOL = TaskPool()
+
 
-    task_queue = queue.Queue()
-    resp_queue = queue.Queue()
+def iter_tasks(tasks, workers=DEFAULT_WORKERS, raise_on_error=True, ordered=True, timeout=None):
+    """
+    Run tasks (callables) on the shared pool with at most workers of them at once.
+    Yields (index, result) in task order, or as they complete if ordered is False.
 
-    for i in range(len(tasks)):
-        task_queue.put([tasks[i], i])
+    A task raising an exception is raised straight away if raise_on_error, otherwise the exception is its result.
+    A task still running after timeout seconds gets a TaskTimeout (it keeps its pool thread until it returns).
+    """
+    tasks = list(tasks)
+    results = queue.Queue()
+    started = {}
+    done = {}
+    submitted = [0]
+
+    def run(task, index):
+        started[index] = time.time()
+        try:
+            results.put([index, task(), False])
+        except Exception as e:
+            results.put([index, e, True])
+
+    def submit():
+        index = submitted[0]
+        submitted[0] += 1
+        TASK_POOL.submit(lambda: run(tasks[index], index))
 
-    threads = []
     num_workers = min(workers, len(tasks))
-    log.debug('Starting {} workers'.format(num_workers))
+    log.debug('Running {} tasks on {} workers'.format(len(tasks), num_workers))
     for i in range(num_workers):
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
-        threads.append(thread)
+        submit()
+
+    next_index = 0
+    while len(done) < len(tasks):
+        wait = None
+        if timeout:
+            now = time.time()
+            # started is added to by the pool threads
+            running = [[index, start] for index, start in list(started.items()) if index not in done]
+            for index, start in running:
+                if now - start >= timeout:
+                    results.put([index, TaskTimeout('Task timed out after {}s'.format(timeout)), True])
+            if running:
+                wait = max(0.05, min(start for index, start in running) + timeout - now)
+            else:
+                wait = 0.5
 
-    results = []
-    exception = None
-    for i in range(len(tasks)):
-        result = resp_queue.get()
+        try:
+            index, result, failed = results.get(timeout=wait)
+        except queue.Empty:
+            continue
 
-        if raise_on_error and isinstance(result[0], Exception):
-            with task_queue.mutex:
-                task_queue.queue.clear()
+        if index in done:
+            # finished after its timeout
+            continue
 
-            exception = result[0]
-            break
+        done[index] = [result, failed]
+        if submitted[0] < len(tasks):
+            submit()
 
-        results.append(result)
+        if failed and raise_on_error:
+            raise result
 
-    for thread in threads:
-        thread.join()
+        if not ordered:
+            yield index, done[index][0]
+            continue
 
-    if exception:
-        raise exception
+        while next_index in done:
+            yield next_index, done[next_index][0]
+            next_index += 1
 
-    return [x[0] for x in sorted(results, key=lambda x: x[1])]
+
+def async_tasks(tasks, workers=DEFAULT_WORKERS, raise_on_error=True, timeout=None, aggregate_errors=False):
+    """
+    Run tasks on the shared pool and return their results in task order.
+    With aggregate_errors, all tasks are run and a TasksError with every failure is raised at the end.
+    """
+    if not aggregate_errors:
+        return [result for index, result in iter_tasks(tasks, workers=workers, raise_on_error=raise_on_error, timeout=timeout)]
+
+    results = []
+    errors = []
+    for index, result in iter_tasks(tasks, workers=workers, raise_on_error=False, timeout=timeout):
+        results.append(result)
+        if isinstance(result, Exception):
+            errors.append(result)
+
+    if errors:
+        raise TasksError(errors, results, '{}/{} tasks failed: {}'.format(len(errors), len(results), errors[0]))
+
+    return results
 
 
 def get_addon(addon_id, required=False, install=True):
@@ -424,7 +512,12 @@ def hash_6(value, default=None, length=6):
 def md5sum(filepath):
     if not os.path.exists(filepath):
         return None
-    return hashlib.md5(open(filepath,'rb').read()).hexdigest()
+
+    md5 = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
 
 
 ## to find BCOV-POLICY. Open below url